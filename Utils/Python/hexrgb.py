@@ -3,6 +3,8 @@ import re
 import os
 from pathlib import Path
 
+from output_files import OutputStats, WRITTEN, UNCHANGED, FAILED, write_text
+
 def convert_hex_to_hexrgb(content, filepath):
     """Convert hex literals to hexrgb() calls and add imports if needed."""
     
@@ -61,9 +63,15 @@ def convert_hex_to_hexrgb(content, filepath):
     return converted_content, (converted_content != content)
 
 def process_directory(root_dir, dry_run=True):
-    """Process all .lua files in directory."""
+    """Process all .lua files in directory.
+
+    Besides processed/modified/errors, the returned stats carry the written,
+    unchanged and failed counts of the shared output layer. In a dry run,
+    written counts the files that would be written.
+    """
     root_path = Path(root_dir)
     stats = {'processed': 0, 'modified': 0, 'errors': 0}
+    output = OutputStats()
     
     for lua_file in root_path.rglob('*.lua'):
         try:
@@ -74,17 +82,18 @@ def process_directory(root_dir, dry_run=True):
             
             stats['processed'] += 1
             if changed:
+                output.record(WRITTEN if dry_run else write_text(lua_file, converted))
                 stats['modified'] += 1
                 print(f"{'[DRY RUN] ' if dry_run else ''}Modified: {lua_file.relative_to(root_path)}")
-                
-                if not dry_run:
-                    with open(lua_file, 'w', encoding='utf-8') as f:
-                        f.write(converted)
+            else:
+                output.record(UNCHANGED)
         
         except Exception as e:
-            stats['errors'] += 1
+            output.record(FAILED)
             print(f"Error processing {lua_file}: {e}")
     
+    stats.update(errors=output.failed, written=output.written,
+                 unchanged=output.unchanged, failed=output.failed)
     return stats
 
 if __name__ == '__main__':
@@ -98,4 +107,5 @@ if __name__ == '__main__':
     if response.lower() == 'yes':
         print("\n=== ACTUAL RUN ===")
         stats = process_directory(ARKITEKT_DIR, dry_run=False)
-        print(f"\nProcessed: {stats['processed']}, Modified: {stats['modified']}, Errors: {stats['errors']}")
\ No newline at end of file
+        print(f"\nProcessed: {stats['processed']}, Modified: {stats['modified']}, Errors: {stats['errors']}")
+        print(f"Files: {stats['written']} written, {stats['unchanged']} unchanged, {stats['failed']} failed")
\ No newline at end of file
@@ -0,0 +1,92 @@
+# @noindex
+"""
+Shared output layer for the Utils/Python generators (svg_to_lua, hexrgb).
+
+Every file is written to a temporary sibling and moved into place with
+os.replace, so an interrupted run never leaves a truncated file behind.
+When the new content matches what is already on disk the temporary file is
+discarded and the target, including its mtime, is left untouched. That keeps
+ReaPack index regeneration, REAPER script reloads and sync traffic limited
+to files that really changed.
+"""
+
+import filecmp
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, IO, Union
+
+WRITTEN = 'written'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+
+class OutputStats:
+    """Counts of written, unchanged and failed outputs for one run."""
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    def record(self, status: str):
+        """Count one output by its status (WRITTEN, UNCHANGED or FAILED)."""
+        setattr(self, status, getattr(self, status) + 1)
+
+    @property
+    def total(self) -> int:
+        return self.written + self.unchanged + self.failed
+
+    def summary(self) -> str:
+        return f"{self.written} written, {self.unchanged} unchanged, {self.failed} failed"
+
+
+def _new_file_mode() -> int:
+    """Permissions a plain open(..., 'w') would give a new file."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_atomic(output_file: Union[str, Path], write: Callable[[IO], None],
+                 binary: bool = False, encoding: str = 'utf-8',
+                 buffering: int = -1) -> str:
+    """Write a file via temp file + rename, skipping it when content is unchanged.
+
+    write receives the open temporary handle (text, or bytes when binary) and
+    may stream into it. Returns WRITTEN or UNCHANGED; on error the temporary
+    file is removed, the target is left as it was and the exception propagates.
+    """
+    output_file = Path(output_file)
+    fd, temp_name = tempfile.mkstemp(prefix=f'.{output_file.name}.', suffix='.tmp',
+                                     dir=output_file.parent)
+    try:
+        if binary:
+            handle = open(fd, 'wb', buffering=buffering)
+        else:
+            handle = open(fd, 'w', encoding=encoding, buffering=buffering)
+        with handle:
+            write(handle)
+
+        if output_file.is_file() and filecmp.cmp(temp_name, output_file, shallow=False):
+            os.unlink(temp_name)
+            return UNCHANGED
+
+        # mkstemp creates 0600 files; keep the permissions the target would get
+        if output_file.exists():
+            os.chmod(temp_name, output_file.stat().st_mode & 0o7777)
+        else:
+            os.chmod(temp_name, _new_file_mode())
+        os.replace(temp_name, output_file)
+        return WRITTEN
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+def write_text(output_file: Union[str, Path], content: str, encoding: str = 'utf-8') -> str:
+    """Write a string with write_atomic; returns WRITTEN or UNCHANGED."""
+    return write_atomic(output_file, lambda f: f.write(content), encoding=encoding)
@@ -0,0 +1,646 @@
+# @noindex
+#!/usr/bin/env python3
+"""
+Golden Raster Diff for svg_to_lua.py output
+Rasterizes generated Lua DrawList code and the source SVG geometry offline and
+reports pixel differences, so converter changes can be checked without REAPER.
+
+Requires: pip install svgpathtools (numpy comes with it), plus Lua 5.4: a
+lua5.4 executable on PATH, or pip install lupa for an embedded Lua 5.4.
+
+The generated module is executed by real Lua 5.4 against a stub ImGui table
+that logs DrawList calls, which are then recorded instead of drawn. The source
+SVG is sampled exactly through svgpathtools and normalized by its exact bounds.
+Its fill, stroke and open/closed subpaths are read from the SVG itself, so
+paint decisions of the converter are checked too. Both are rendered by the same
+supersampling rasterizer. PathFillConvex is rasterized as ImGui's triangle fan, so a concave path wrongly
+sent to it shows up as a diff; the SVG reference uses a nonzero-winding fill.
+
+Usage:
+    # Check every SVG in svg/ at the default sizes
+    python svg_raster_diff.py
+
+    # Check one SVG against a module already on disk
+    python svg_raster_diff.py icon.svg --lua icon.lua
+
+    # Tighter thresholds, more sizes, keep the rasters for inspection
+    python svg_raster_diff.py --svg-dir svg/ --sizes 16 24 48 128 \\
+        --max-mean-diff 0.01 --dump-dir raster_diff/
+"""
+
+import argparse
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    from svgpathtools import Line
+except ImportError:
+    print("Error: svgpathtools not installed", file=sys.stderr)
+    print("Install with: pip install svgpathtools", file=sys.stderr)
+    sys.exit(1)
+
+import svg_to_lua
+
+
+# Sub-pixel samples per axis when computing coverage.
+DEFAULT_SUPERSAMPLE = 4
+
+# Line segments used to flatten each curve segment (ImGui does similar).
+CURVE_STEPS = 24
+
+# Line segments used to flatten full circles/ellipses and rounded corners.
+ELLIPSE_STEPS = 64
+CORNER_STEPS = 8
+
+# Empty border around the icon so strokes on the bounds aren't clipped.
+CANVAS_MARGIN = 4
+
+# Per-pixel coverage difference above which a pixel counts as mismatched.
+MISMATCH_LEVEL = 0.25
+
+
+# ---------------------------------------------------------------------------
+# Lua runtime
+# ---------------------------------------------------------------------------
+
+# Standalone interpreters tried first; otherwise lupa's embedded Lua 5.4 is used.
+LUA_EXECUTABLES = ('lua5.4', 'lua54')
+
+# Runs one generated module against a stub ImGui table that logs every
+# DrawList call as "Name arg arg ..." and returns the log.
+LUA_DRIVER = r"""
+return function(source, function_name, x, y, size, dpi)
+  local log = {}
+  local ImGui = {
+    DrawFlags_None = 0,
+    DrawFlags_Closed = 1,
+    GetWindowDrawList = function(ctx) return 'drawlist' end,
+    GetWindowDpiScale = function(ctx) return dpi end,
+  }
+  setmetatable(ImGui, {__index = function(_, name)
+    if not name:match('^DrawList_') then
+      error('unsupported ImGui member ' .. name, 2)
+    end
+    return function(dl, ...)
+      local parts = {name}
+      for i = 1, select('#', ...) do
+        local v = select(i, ...)
+        parts[#parts + 1] = math.type(v) and string.format('%.17g', v) or tostring(v)
+      end
+      log[#log + 1] = table.concat(parts, ' ')
+    end
+  end})
+
+  reaper = {ImGui_GetBuiltinPath = function() return '' end}
+  package.loaded['imgui'] = nil
+  package.preload['imgui'] = function() return function(version) return ImGui end end
+
+  local M = assert(load(source, '=module', 't'))()
+  assert(type(M) == 'table', 'module did not return a table')
+  local draw = M[function_name]
+  assert(type(draw) == 'function', "module has no function '" .. function_name .. "'")
+  draw('ctx', x, y, size, 0xFFFFFFFF)
+  return table.concat(log, '\n')
+end
+"""
+
+# Command-line wrapper: lua5.4 - <module file> <function> <x> <y> <size> <dpi>
+LUA_DRIVER_MAIN = """
+local run = (function() %s end)()
+local f = assert(io.open(arg[1], 'rb'))
+local source = f:read('a')
+f:close()
+io.write(run(source, arg[2], tonumber(arg[3]), tonumber(arg[4]), tonumber(arg[5]), tonumber(arg[6])))
+""" % LUA_DRIVER
+
+
+class LuaError(Exception):
+    """Raised when a generated module fails to load or run."""
+
+
+def run_lua_draw(source: bytes, function_name: str, x: float, y: float,
+                 size: float, dpi: float = 1.0) -> str:
+    """Run a generated draw function in real Lua 5.4 and return its call log."""
+    executable = next(filter(None, map(shutil.which, LUA_EXECUTABLES)), None)
+    if executable:
+        with tempfile.NamedTemporaryFile('wb', suffix='.lua', delete=False) as f:
+            f.write(source)
+        try:
+            result = subprocess.run(
+                [executable, '-', f.name, function_name, repr(x), repr(y), repr(size), repr(dpi)],
+                input=LUA_DRIVER_MAIN.encode('utf-8'), capture_output=True)
+        finally:
+            os.unlink(f.name)
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', 'replace').strip()
+            raise LuaError(stderr.splitlines()[0] if stderr
+                           else f"{executable} exited with status {result.returncode}")
+        return result.stdout.decode('utf-8')
+
+    try:
+        from lupa import lua54
+    except ImportError:
+        raise LuaError("Lua 5.4 not found: install lua5.4 or pip install lupa")
+    runtime = lua54.LuaRuntime()
+    try:
+        return runtime.execute(LUA_DRIVER)(source, function_name, x, y, size, dpi)
+    except lua54.LuaError as e:
+        raise LuaError(str(e).splitlines()[0])
+
+
+# ---------------------------------------------------------------------------
+# DrawList recording
+# ---------------------------------------------------------------------------
+
+DRAW_FLAGS_CLOSED = 1
+
+
+def _flatten_quadratic(p0, p1, p2, steps: int = CURVE_STEPS) -> List[Tuple[float, float]]:
+    t = np.linspace(0.0, 1.0, steps + 1)[1:, None]
+    pts = (1 - t) ** 2 * np.array(p0) + 2 * (1 - t) * t * np.array(p1) + t ** 2 * np.array(p2)
+    return [tuple(p) for p in pts]
+
+
+def _flatten_cubic(p0, p1, p2, p3, steps: int = CURVE_STEPS) -> List[Tuple[float, float]]:
+    t = np.linspace(0.0, 1.0, steps + 1)[1:, None]
+    pts = ((1 - t) ** 3 * np.array(p0) + 3 * (1 - t) ** 2 * t * np.array(p1) +
+           3 * (1 - t) * t ** 2 * np.array(p2) + t ** 3 * np.array(p3))
+    return [tuple(p) for p in pts]
+
+
+def _ellipse_points(cx: float, cy: float, rx: float, ry: float, rot: float = 0.0) -> np.ndarray:
+    angles = np.linspace(0.0, 2 * math.pi, ELLIPSE_STEPS, endpoint=False)
+    ex, ey = rx * np.cos(angles), ry * np.sin(angles)
+    cos_r, sin_r = math.cos(rot), math.sin(rot)
+    return np.column_stack([cx + ex * cos_r - ey * sin_r, cy + ex * sin_r + ey * cos_r])
+
+
+def _rect_points(x1: float, y1: float, x2: float, y2: float, rounding: float = 0.0) -> np.ndarray:
+    x1, x2 = min(x1, x2), max(x1, x2)
+    y1, y2 = min(y1, y2), max(y1, y2)
+    r = min(rounding, (x2 - x1) / 2, (y2 - y1) / 2)
+    if r <= 0:
+        return np.array([(x1, y1), (x2, y1), (x2, y2), (x1, y2)])
+    points = []
+    corners = ((x2 - r, y1 + r, -0.5), (x2 - r, y2 - r, 0.0), (x1 + r, y2 - r, 0.5), (x1 + r, y1 + r, 1.0))
+    for cx, cy, start in corners:
+        angles = (start + np.linspace(0.0, 0.5, CORNER_STEPS + 1)) * math.pi
+        points.extend(zip(cx + r * np.cos(angles), cy + r * np.sin(angles)))
+    return np.array(points)
+
+
+class DrawListRecorder:
+    """Stands in for ReaImGui: records DrawList calls as flattened shapes.
+
+    Shapes are ('convex', points) or ('stroke', points, closed, thickness)
+    with points an (N, 2) array in pixels. 'convex' fills are drawn the way
+    ImGui draws them: as a triangle fan from the first point.
+    """
+
+    def __init__(self, dpi: float = 1.0):
+        self.dpi = dpi
+        self.shapes = []
+        self.path: List[Tuple[float, float]] = []
+
+    def _current(self) -> Tuple[float, float]:
+        return self.path[-1] if self.path else (0.0, 0.0)
+
+    def replay(self, log: str):
+        """Apply a call log from run_lua_draw to the recorder."""
+        handlers = self._handlers()
+        for line in log.splitlines():
+            name, *args = line.split(' ')
+            if name not in handlers:
+                raise LuaError(f"unsupported ImGui call {name}")
+            handlers[name]('drawlist', *(None if a == 'nil' else float(a) for a in args))
+
+    def _handlers(self) -> Dict[str, object]:
+        """DrawList functions by ImGui name."""
+
+        def path_clear(dl):
+            self.path = []
+
+        def path_line_to(dl, x, y):
+            self.path.append((x, y))
+
+        def path_quadratic(dl, x1, y1, x2, y2, num_segments=0):
+            self.path.extend(_flatten_quadratic(self._current(), (x1, y1), (x2, y2)))
+
+        def path_cubic(dl, x1, y1, x2, y2, x3, y3, num_segments=0):
+            self.path.extend(_flatten_cubic(self._current(), (x1, y1), (x2, y2), (x3, y3)))
+
+        def path_fill_convex(dl, color):
+            if len(self.path) >= 3:
+                self.shapes.append(('convex', np.array(self.path)))
+            self.path = []
+
+        def path_stroke(dl, color, flags=0, thickness=1.0):
+            if len(self.path) >= 2:
+                closed = bool(int(flags or 0) & DRAW_FLAGS_CLOSED)
+                self.shapes.append(('stroke', np.array(self.path), closed, thickness))
+            self.path = []
+
+        def add_fill(points):
+            self.shapes.append(('convex', points))
+
+        def add_stroke(points, closed, thickness):
+            self.shapes.append(('stroke', points, closed, thickness if thickness else 1.0))
+
+        def add_circle(dl, cx, cy, r, color, num_segments=0, thickness=1.0):
+            add_stroke(_ellipse_points(cx, cy, r, r), True, thickness)
+
+        def add_circle_filled(dl, cx, cy, r, color, num_segments=0):
+            add_fill(_ellipse_points(cx, cy, r, r))
+
+        def add_ellipse(dl, cx, cy, rx, ry, color, rot=0.0, num_segments=0, thickness=1.0):
+            add_stroke(_ellipse_points(cx, cy, rx, ry, rot or 0.0), True, thickness)
+
+        def add_ellipse_filled(dl, cx, cy, rx, ry, color, rot=0.0, num_segments=0):
+            add_fill(_ellipse_points(cx, cy, rx, ry, rot or 0.0))
+
+        def add_rect(dl, x1, y1, x2, y2, color, rounding=0.0, flags=0, thickness=1.0):
+            add_stroke(_rect_points(x1, y1, x2, y2, rounding or 0.0), True, thickness)
+
+        def add_rect_filled(dl, x1, y1, x2, y2, color, rounding=0.0, flags=0):
+            add_fill(_rect_points(x1, y1, x2, y2, rounding or 0.0))
+
+        def add_line(dl, x1, y1, x2, y2, color, thickness=1.0):
+            add_stroke(np.array([(x1, y1), (x2, y2)]), False, thickness)
+
+        return {
+            'DrawList_PathClear': path_clear,
+            'DrawList_PathLineTo': path_line_to,
+            'DrawList_PathBezierQuadraticCurveTo': path_quadratic,
+            'DrawList_PathBezierCubicCurveTo': path_cubic,
+            'DrawList_PathFillConvex': path_fill_convex,
+            'DrawList_PathStroke': path_stroke,
+            'DrawList_AddCircle': add_circle,
+            'DrawList_AddCircleFilled': add_circle_filled,
+            'DrawList_AddEllipse': add_ellipse,
+            'DrawList_AddEllipseFilled': add_ellipse_filled,
+            'DrawList_AddRect': add_rect,
+            'DrawList_AddRectFilled': add_rect_filled,
+            'DrawList_AddLine': add_line,
+        }
+
+
+def record_lua_draw(source: bytes, function_name: str, size: float,
+                    offset: float = CANVAS_MARGIN) -> list:
+    """Run a generated draw function at the given size and return its shapes."""
+    recorder = DrawListRecorder()
+    recorder.replay(run_lua_draw(source, function_name, offset, offset, size, recorder.dpi))
+    return recorder.shapes
+
+
+def _shape_extent(shape) -> Tuple[float, float, float, float]:
+    """Exact (xmin, xmax, ymin, ymax) of a basic shape."""
+    if isinstance(shape, svg_to_lua.CircleShape):
+        return shape.cx - shape.r, shape.cx + shape.r, shape.cy - shape.r, shape.cy + shape.r
+    if isinstance(shape, svg_to_lua.EllipseShape):
+        return shape.cx - shape.rx, shape.cx + shape.rx, shape.cy - shape.ry, shape.cy + shape.ry
+    if isinstance(shape, svg_to_lua.RectShape):
+        return shape.x, shape.x + shape.width, shape.y, shape.y + shape.height
+    return (min(shape.x1, shape.x2), max(shape.x1, shape.x2),
+            min(shape.y1, shape.y2), max(shape.y1, shape.y2))
+
+
+def _shape_outline(shape, to_px, scale: float) -> Tuple[np.ndarray, bool]:
+    """Flatten a basic shape to pixel points; returns (points, closed)."""
+    if isinstance(shape, svg_to_lua.CircleShape):
+        cx, cy = to_px(shape.cx, shape.cy)
+        return _ellipse_points(cx, cy, shape.r * scale, shape.r * scale), True
+    if isinstance(shape, svg_to_lua.EllipseShape):
+        cx, cy = to_px(shape.cx, shape.cy)
+        return _ellipse_points(cx, cy, shape.rx * scale, shape.ry * scale), True
+    if isinstance(shape, svg_to_lua.RectShape):
+        x1, y1 = to_px(shape.x, shape.y)
+        x2, y2 = to_px(shape.x + shape.width, shape.y + shape.height)
+        return _rect_points(x1, y1, x2, y2, shape.rounding * scale), True
+    return np.array([to_px(shape.x1, shape.y1), to_px(shape.x2, shape.y2)]), False
+
+
+def _is_painted(paint: str) -> bool:
+    return paint not in ('none', 'transparent', '')
+
+
+def record_svg_reference(svg_path: Path, size: float, offset: float = CANVAS_MARGIN) -> list:
+    """Sample the source SVG geometry exactly, normalized by its exact bounds.
+
+    Fill and stroke come from the SVG attributes, and a subpath is only
+    stroked closed when it is closed in the SVG. Fills are nonzero-winding
+    over all subpaths of a path. Stroke widths are taken as pixels, the
+    unit the converter emits them in.
+    """
+    paths, attributes, basic_shapes, _ = svg_to_lua.load_svg_geometry(svg_path)
+
+    boxes = np.array([path.bbox() for path in paths if path] +
+                     [_shape_extent(shape) for shape in basic_shapes])
+    min_x, min_y = boxes[:, 0].min(), boxes[:, 2].min()
+    max_dim = max(boxes[:, 1].max() - min_x, boxes[:, 3].max() - min_y) or 1.0
+    scale = size / max_dim
+
+    def to_px(px: float, py: float) -> Tuple[float, float]:
+        return (px - min_x) * scale + offset, (py - min_y) * scale + offset
+
+    shapes = []
+    for path, attrs in zip(paths, attributes):
+        if not path:
+            continue
+        fill = svg_to_lua.get_element_style(attrs, 'fill', 'black')
+        stroke = svg_to_lua.get_element_style(attrs, 'stroke', 'none')
+        width = float(svg_to_lua.get_element_style(attrs, 'stroke-width', '1'))
+
+        rings = []
+        for subpath in path.continuous_subpaths():
+            points = [subpath[0].start]
+            for segment in subpath:
+                steps = 1 if isinstance(segment, Line) else CURVE_STEPS
+                points.extend(segment.point(t) for t in np.linspace(0.0, 1.0, steps + 1)[1:])
+            rings.append((np.array([to_px(p.real, p.imag) for p in points]), subpath.isclosed()))
+
+        if _is_painted(fill):
+            shapes.append(('fill', [pts for pts, _ in rings]))
+        if _is_painted(stroke):
+            shapes.extend(('stroke', pts, closed, width) for pts, closed in rings)
+
+    for shape in basic_shapes:
+        pts, closed = _shape_outline(shape, to_px, scale)
+        if closed and _is_painted(shape.fill):
+            shapes.append(('fill', [pts]))
+        if _is_painted(shape.stroke):
+            shapes.append(('stroke', pts, closed, shape.stroke_width))
+    return shapes
+
+
+# ---------------------------------------------------------------------------
+# Rasterization and metrics
+# ---------------------------------------------------------------------------
+
+def _fill_coverage(rings: List[np.ndarray], grid: int, ss: int) -> np.ndarray:
+    """Nonzero-winding fill of closed polygons on a supersampled grid (SVG reference)."""
+    mask = np.zeros((grid, grid), dtype=bool)
+    p0 = np.concatenate(rings)
+    p1 = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+    y0, y1 = p0[:, 1] * ss, p1[:, 1] * ss
+    x0, x1 = p0[:, 0] * ss, p1[:, 0] * ss
+    winding = np.where(y1 > y0, 1, -1)
+    ylo, yhi = np.minimum(y0, y1), np.maximum(y0, y1)
+    xs = np.arange(grid) + 0.5
+
+    row_min = max(int(math.floor(ylo.min())), 0)
+    row_max = min(int(math.ceil(yhi.max())), grid)
+    for row in range(row_min, row_max):
+        sy = row + 0.5
+        active = (ylo <= sy) & (yhi > sy)
+        if not active.any():
+            continue
+        t = (sy - y0[active]) / (y1[active] - y0[active])
+        cross_x = x0[active] + t * (x1[active] - x0[active])
+        order = np.argsort(cross_x)
+        cross_x = cross_x[order]
+        cum = np.concatenate(([0], np.cumsum(winding[active][order])))
+        mask[row] = cum[np.searchsorted(cross_x, xs)] != 0
+    return mask
+
+
+def _fan_coverage(points: np.ndarray, grid: int, ss: int) -> np.ndarray:
+    """Union of the fan triangles (p0, p[i], p[i+1]), as AddConvexPolyFilled draws.
+
+    For a concave outline this also covers the notches, exactly the artifact
+    PathFillConvex shows in REAPER.
+    """
+    mask = np.zeros((grid, grid), dtype=bool)
+    pts = points * ss
+    ax, ay = pts[0]
+    for (bx, by), (cx, cy) in zip(pts[1:-1], pts[2:]):
+        area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        if area == 0:
+            continue
+        x_lo = max(int(math.floor(min(ax, bx, cx))), 0)
+        x_hi = min(int(math.ceil(max(ax, bx, cx))) + 1, grid)
+        y_lo = max(int(math.floor(min(ay, by, cy))), 0)
+        y_hi = min(int(math.ceil(max(ay, by, cy))) + 1, grid)
+        if x_lo >= x_hi or y_lo >= y_hi:
+            continue
+        gx = np.arange(x_lo, x_hi)[None, :] + 0.5
+        gy = np.arange(y_lo, y_hi)[:, None] + 0.5
+        sign = 1.0 if area > 0 else -1.0
+        inside = np.ones((y_hi - y_lo, x_hi - x_lo), dtype=bool)
+        for (ex, ey), (fx, fy) in (((ax, ay), (bx, by)), ((bx, by), (cx, cy)), ((cx, cy), (ax, ay))):
+            inside &= sign * ((fx - ex) * (gy - ey) - (fy - ey) * (gx - ex)) >= 0
+        mask[y_lo:y_hi, x_lo:x_hi] |= inside
+    return mask
+
+
+def _stroke_coverage(points: np.ndarray, closed: bool, thickness: float,
+                     grid: int, ss: int) -> np.ndarray:
+    """Union of capsules of the given thickness around each polyline edge."""
+    mask = np.zeros((grid, grid), dtype=bool)
+    pts = np.vstack([points, points[:1]]) if closed else points
+    half = max(thickness, 1.0) * ss / 2.0
+    for (ax, ay), (bx, by) in zip(pts[:-1] * ss, pts[1:] * ss):
+        x_lo = max(int(math.floor(min(ax, bx) - half)), 0)
+        x_hi = min(int(math.ceil(max(ax, bx) + half)) + 1, grid)
+        y_lo = max(int(math.floor(min(ay, by) - half)), 0)
+        y_hi = min(int(math.ceil(max(ay, by) + half)) + 1, grid)
+        if x_lo >= x_hi or y_lo >= y_hi:
+            continue
+        gx = np.arange(x_lo, x_hi)[None, :] + 0.5
+        gy = np.arange(y_lo, y_hi)[:, None] + 0.5
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        if length_sq > 0:
+            t = np.clip(((gx - ax) * dx + (gy - ay) * dy) / length_sq, 0.0, 1.0)
+        else:
+            t = 0.0
+        dist_sq = (gx - ax - t * dx) ** 2 + (gy - ay - t * dy) ** 2
+        mask[y_lo:y_hi, x_lo:x_hi] |= dist_sq <= half * half
+    return mask
+
+
+def rasterize(shapes: list, canvas: int, supersample: int = DEFAULT_SUPERSAMPLE) -> np.ndarray:
+    """Render recorded shapes to a (canvas, canvas) coverage image in [0, 1].
+
+    Every shape is drawn in the same color, so overlaps are composited with
+    'over' blending of their coverage, as ImGui would.
+    """
+    grid = canvas * supersample
+    image = np.zeros((canvas, canvas))
+    for shape in shapes:
+        if shape[0] == 'fill':
+            mask = _fill_coverage(shape[1], grid, supersample)
+        elif shape[0] == 'convex':
+            mask = _fan_coverage(shape[1], grid, supersample)
+        else:
+            mask = _stroke_coverage(shape[1], shape[2], shape[3], grid, supersample)
+        coverage = mask.reshape(canvas, supersample, canvas, supersample).mean(axis=(1, 3))
+        image = image + coverage * (1.0 - image)
+    return image
+
+
+def diff_metrics(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Pixel-difference metrics between two coverage images.
+
+    Mean and mismatch are taken over the inked area (pixels either image
+    touches) so small icons on a large canvas aren't diluted by background.
+    """
+    diff = np.abs(reference - candidate)
+    ink = (reference > 0) | (candidate > 0)
+    ink_count = np.count_nonzero(ink)
+    ref_on = reference >= 0.5
+    cand_on = candidate >= 0.5
+    union = np.count_nonzero(ref_on | cand_on)
+    return {
+        'mean': float(diff[ink].mean()) if ink_count else 0.0,
+        'max': float(diff.max()),
+        'mismatch': float(np.count_nonzero(diff[ink] > MISMATCH_LEVEL)) / ink_count if ink_count else 0.0,
+        'iou': float(np.count_nonzero(ref_on & cand_on)) / union if union else 1.0,
+    }
+
+
+def write_pgm(path: Path, image: np.ndarray):
+    """Save a coverage image as a binary greyscale PGM."""
+    data = (np.clip(image, 0.0, 1.0) * 255).round().astype(np.uint8)
+    with open(path, 'wb') as f:
+        f.write(f"P5\n{data.shape[1]} {data.shape[0]}\n255\n".encode('ascii'))
+        f.write(data.tobytes())
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def check_icon(svg_path: Path, lua_source: bytes, function_name: str, sizes: List[int],
+               supersample: int, dump_dir: Optional[Path] = None) -> List[Tuple[int, Dict[str, float]]]:
+    """Compare generated Lua against the SVG at each size."""
+    results = []
+    for size in sizes:
+        canvas = size + 2 * CANVAS_MARGIN
+        reference = rasterize(record_svg_reference(svg_path, size), canvas, supersample)
+        candidate = rasterize(record_lua_draw(lua_source, function_name, size), canvas, supersample)
+        results.append((size, diff_metrics(reference, candidate)))
+
+        if dump_dir:
+            stem = f"{svg_path.stem}_{size}"
+            write_pgm(dump_dir / f"{stem}_ref.pgm", reference)
+            write_pgm(dump_dir / f"{stem}_lua.pgm", candidate)
+            write_pgm(dump_dir / f"{stem}_diff.pgm", np.abs(reference - candidate))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Rasterize svg_to_lua.py output and the source SVG offline and compare them',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Check every SVG in svg/
+  python svg_raster_diff.py
+
+  # Check one SVG against an existing module
+  python svg_raster_diff.py icon.svg --lua icon.lua -f draw_icon
+
+  # Verify unrolled output instead of instanced helpers
+  python svg_raster_diff.py icon.svg --no-instancing
+
+  # Verify the packed-string encoding
+  python svg_raster_diff.py --emit packed
+
+Metrics (per icon and size, coverage in 0..1):
+  mean      mean absolute coverage difference over the inked area
+  max       largest per-pixel difference
+  mismatch  fraction of inked pixels differing by more than 0.25
+  iou       intersection-over-union of the >= 0.5 coverage masks
+        """
+    )
+
+    parser.add_argument('inputs', type=Path, nargs='*', help='SVG files to check')
+    parser.add_argument('--svg-dir', type=Path, default=None,
+                       help='Check every SVG in this directory (default: svg/)')
+    parser.add_argument('--lua', type=Path, default=None,
+                       help='Existing Lua module to check (single SVG only; default: generate)')
+    parser.add_argument('-f', '--function-name', default=None,
+                       help='Draw function in --lua module (default: draw_<svg name>)')
+    parser.add_argument('--emit', choices=('lua', 'packed'), default='lua',
+                       help='Converter backend to generate with (default: lua)')
+    parser.add_argument('--no-instancing', action='store_true',
+                       help='Generate unrolled output instead of instanced helpers')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 32, 64],
+                       help='Icon sizes in pixels (default: 16 32 64)')
+    parser.add_argument('--supersample', type=int, default=DEFAULT_SUPERSAMPLE,
+                       help=f'Samples per pixel axis (default: {DEFAULT_SUPERSAMPLE})')
+    parser.add_argument('--max-mean-diff', type=float, default=0.02,
+                       help='Fail when mean coverage difference exceeds this (default: 0.02)')
+    parser.add_argument('--max-mismatch', type=float, default=0.03,
+                       help='Fail when the mismatched pixel fraction exceeds this (default: 0.03)')
+    parser.add_argument('--min-iou', type=float, default=0.97,
+                       help='Fail when mask intersection-over-union drops below this (default: 0.97)')
+    parser.add_argument('--dump-dir', type=Path, default=None,
+                       help='Write reference, generated and diff rasters as PGM files')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                       help='Only report failures')
+
+    args = parser.parse_args()
+
+    svg_files = list(args.inputs)
+    if not svg_files:
+        svg_dir = args.svg_dir or Path(__file__).parent / 'svg'
+        svg_files = sorted(svg_dir.glob('*.svg'))
+        if not svg_files:
+            print(f"Error: No SVG files found in: {svg_dir}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.lua and len(svg_files) != 1:
+        parser.error("--lua can only be used with a single SVG input")
+
+    if args.dump_dir:
+        args.dump_dir.mkdir(parents=True, exist_ok=True)
+
+    failures = 0
+    for svg_file in svg_files:
+        function_name = args.function_name or f"draw_{svg_to_lua.sanitize_function_name(svg_file.name)}"
+        try:
+            if args.lua:
+                lua_source = args.lua.read_bytes()
+            else:
+                emitter = svg_to_lua.BACKENDS[args.emit][0]
+                lua_source = '\n'.join(emitter(
+                    svg_to_lua.build_ir(svg_file),
+                    function_name,
+                    instancing=not args.no_instancing
+                )).encode('utf-8')
+            results = check_icon(svg_file, lua_source, function_name, args.sizes,
+                                 args.supersample, args.dump_dir)
+        except Exception as e:
+            failures += 1
+            print(f"ERROR: {svg_file.name}: {e}", file=sys.stderr)
+            continue
+
+        for size, metrics in results:
+            ok = (metrics['mean'] <= args.max_mean_diff and
+                  metrics['mismatch'] <= args.max_mismatch and
+                  metrics['iou'] >= args.min_iou)
+            if not ok:
+                failures += 1
+            if not ok or not args.quiet:
+                status = 'OK' if ok else 'FAIL'
+                print(f"{status:4} {svg_file.name} @{size}px: mean={metrics['mean']:.4f} "
+                      f"max={metrics['max']:.3f} mismatch={metrics['mismatch']:.4f} "
+                      f"iou={metrics['iou']:.4f}")
+
+    if not args.quiet:
+        print()
+        print(f"Completed: {len(svg_files)} icon(s), {failures} failure(s)")
+
+    sys.exit(0 if failures == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,21 +16,27 @@ Usage:
     # Batch conversion from svg/ folder
     python svg_to_lua.py --batch [--output-dir output/]
 
+    # Cache the parsed geometry, then emit from it
+    python svg_to_lua.py input.svg --emit-ir input.npz
+    python svg_to_lua.py --from-ir input.npz [--emit lua|packed|stats] [--output output.lua]
+
 Example:
     python svg_to_lua.py arkitekt_logo.svg --function-name draw_arkitekt_accurate -o icon.lua
     python svg_to_lua.py --batch --output-dir lua_icons/
 """
 
 import argparse
+import itertools
 import sys
 import math
 import re
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterable, Iterator, TextIO, NamedTuple, Union
 
 try:
+    import numpy as np
     from svgpathtools import svg2paths, Line, QuadraticBezier, CubicBezier, Arc
-    from svgpathtools import parse_path
+    from svgpathtools import Path as SvgPath
 except ImportError:
     print("Error: svgpathtools not installed", file=sys.stderr)
     print("Install with: pip install svgpathtools", file=sys.stderr)
@@ -38,6 +44,23 @@ except ImportError:
 
 import xml.etree.ElementTree as ET
 
+from output_files import OutputStats, FAILED, UNCHANGED, write_atomic
+
+# Canonical shape coordinates are rounded to this many decimals before hashing,
+# so float noise from the exporter doesn't split otherwise identical shapes.
+INSTANCE_KEY_PRECISION = 4
+
+# Generated modules can run to hundreds of MB for map/waveform SVGs; lines are
+# streamed through this buffer instead of being joined in memory.
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Geometry IR path opcodes; each consumes OP_POINTS[op] (x, y) rows of coords.
+OP_MOVE, OP_LINE, OP_QUAD, OP_CUBIC = range(4)
+OP_POINTS = (1, 1, 2, 3)
+
+# Bumped whenever the .npz layout written by save_ir changes.
+IR_FORMAT_VERSION = 1
+
 
 def parse_style_attribute(style_str: str) -> Dict[str, str]:
     """Parse CSS-style attribute string into a dictionary."""
@@ -74,239 +97,425 @@ def sanitize_function_name(name: str) -> str:
     return name or 'draw_icon'
 
 
-class LuaCodeGenerator:
-    """Generate ReaImGui DrawList code from parsed SVG paths."""
+class CircleShape(NamedTuple):
+    """SVG <circle>, drawn with DrawList_AddCircle[Filled]."""
+    cx: float
+    cy: float
+    r: float
+    fill: str
+    stroke: str
+    stroke_width: float
+
+
+class EllipseShape(NamedTuple):
+    """SVG <ellipse>, drawn with DrawList_AddEllipse[Filled]."""
+    cx: float
+    cy: float
+    rx: float
+    ry: float
+    fill: str
+    stroke: str
+    stroke_width: float
+
+
+class RectShape(NamedTuple):
+    """SVG <rect> with uniform corner rounding, drawn with DrawList_AddRect[Filled]."""
+    x: float
+    y: float
+    width: float
+    height: float
+    rounding: float
+    fill: str
+    stroke: str
+    stroke_width: float
+
+
+class LineShape(NamedTuple):
+    """SVG <line>, drawn with DrawList_AddLine."""
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    stroke: str
+    stroke_width: float
+
+
+BasicShape = Union[CircleShape, EllipseShape, RectShape, LineShape]
+
+
+def is_likely_convex(path) -> bool:
+    """Heuristic check if a path is likely convex (safe for PathFillConvex)."""
+    if len(path) <= 3:
+        return True  # Triangle or simpler is always convex
+    
+    # Simple rectangle (4 line segments)
+    if len(path) == 4 and all(isinstance(seg, Line) for seg in path):
+        return True
+    
+    # Circle-like shapes (smooth bezier curves, no lines)
+    if all(isinstance(seg, (CubicBezier, QuadraticBezier)) for seg in path):
+        # If it's 4 bezier segments, likely a circle/ellipse
+        if len(path) == 4:
+            return True
+    
+    # Mixed line and bezier with many segments suggests complex shape
+    has_lines = any(isinstance(seg, Line) for seg in path)
+    has_beziers = any(isinstance(seg, (CubicBezier, QuadraticBezier)) for seg in path)
+    
+    if has_lines and has_beziers and len(path) > 5:
+        return False  # Complex mixed shape, probably non-convex
+    
+    return True  # Default to convex
 
-    def __init__(self, normalize: bool = True, viewbox: Optional[Tuple[float, float, float, float]] = None):
-        self.normalize = normalize
-        self.viewbox = viewbox
-        self.min_x = float('inf')
-        self.min_y = float('inf')
-        self.max_x = float('-inf')
-        self.max_y = float('-inf')
-
-    def _update_bounds(self, x: float, y: float):
-        """Update bounding box."""
-        self.min_x = min(self.min_x, x)
-        self.min_y = min(self.min_y, y)
-        self.max_x = max(self.max_x, x)
-        self.max_y = max(self.max_y, y)
-
-    def _normalize_coord(self, value: float, is_x: bool = True) -> str:
-        """Normalize coordinate to 0-1 range based on actual content bounds."""
-        if not self.normalize:
-            return f"{value:.6f}"
 
-        # Always use actual content bounds for normalization
-        width = self.max_x - self.min_x
-        height = self.max_y - self.min_y
-        max_dim = max(width, height) if max(width, height) > 0 else 1.0
+def paint_ops(fill: str, stroke: str, stroke_width: float,
+              is_convex: bool) -> List[Tuple[str, float]]:
+    """Decide how a path is painted.
 
-        if is_x:
-            normalized = (value - self.min_x) / max_dim
+    Returns ('fill', 0.0) and/or ('stroke', width) entries, width being in
+    pixels before DPI scaling.
+    """
+    has_fill = fill not in ['none', 'transparent', '']
+    has_stroke = stroke not in ['none', 'transparent', '']
+
+    ops = []
+    if has_fill:
+        if is_convex:
+            ops.append(('fill', 0.0))
         else:
-            normalized = (value - self.min_y) / max_dim
+            # Non-convex path - use stroke instead to avoid rendering issues
+            ops.append(('stroke', 2.5))
 
-        return f"{normalized:.6f}"
+    if has_stroke:
+        ops.append(('stroke', stroke_width))
 
-    def _arc_to_lua(self, arc: Arc, lua_lines: List[str]):
-        """Convert Arc to cubic bezier approximation.
+    if not has_fill and not has_stroke:
+        ops.append(('fill', 0.0) if is_convex else ('stroke', 2.0))
 
-        Arcs are split into segments of at most 90 degrees for accuracy.
-        """
-        delta = arc.delta
-        num_segments = max(1, int(math.ceil(abs(delta) / 90.0)))
+    return ops
 
-        for i in range(num_segments):
-            t_start = i / num_segments
-            t_end = (i + 1) / num_segments
 
-            p0 = arc.point(t_start)
-            p3 = arc.point(t_end)
+def shape_paint_ops(shape: BasicShape) -> List[Tuple[str, float]]:
+    """Decide how a basic shape is painted (same rules as paths).
 
-            segment_angle = abs(delta) / num_segments * math.pi / 180.0
+    Lines have no interior: they are stroked, or not drawn when the stroke
+    is none.
+    """
+    if isinstance(shape, LineShape):
+        if shape.stroke in ['none', 'transparent', '']:
+            return []
+        return [('stroke', shape.stroke_width)]
+    return paint_ops(shape.fill, shape.stroke, shape.stroke_width, True)
 
-            if segment_angle > 0:
-                k = (4.0 / 3.0) * math.tan(segment_angle / 4.0)
-            else:
-                k = 0
 
-            d0 = arc.derivative(t_start)
-            d3 = arc.derivative(t_end)
+class PathStyle(NamedTuple):
+    """Paint attributes of one IR path."""
+    fill: str
+    stroke: str
+    stroke_width: float
+    convex: bool
 
-            arc_len = abs(arc.length() * (t_end - t_start))
-            if arc_len > 0:
-                scale = arc_len * k / 3.0
-                d0_norm = abs(d0)
-                d3_norm = abs(d3)
 
-                if d0_norm > 0:
-                    p1 = p0 + (d0 / d0_norm) * scale
-                else:
-                    p1 = p0 + (p3 - p0) * 0.33
+class LuaCodeGenerator:
+    """Generate ReaImGui DrawList code from parsed SVG paths."""
 
-                if d3_norm > 0:
-                    p2 = p3 - (d3 / d3_norm) * scale
-                else:
-                    p2 = p0 + (p3 - p0) * 0.67
-            else:
-                p1 = p0 + (p3 - p0) * 0.33
-                p2 = p0 + (p3 - p0) * 0.67
+    def __init__(self, normalize: bool = True, viewbox: Optional[Tuple[float, float, float, float]] = None,
+                 bounds: Optional['DocumentBounds'] = None):
+        self.normalize = normalize
+        self.viewbox = viewbox
+        self.bounds = bounds
+        self.min_x = bounds.min_x if bounds else float('inf')
+        self.min_y = bounds.min_y if bounds else float('inf')
+        self.max_x = bounds.max_x if bounds else float('-inf')
+        self.max_y = bounds.max_y if bounds else float('-inf')
+
+    def _normalize_coord(self, value: float, is_x: bool = True,
+                         origin: Optional[complex] = None) -> str:
+        """Normalize coordinate to 0-1 range based on actual content bounds.
+
+        When origin is given the coordinate is made relative to that point
+        instead of the bounds corner (used for instanced shape helpers).
+        """
+        if origin is not None:
+            base = origin.real if is_x else origin.imag
+        elif self.normalize:
+            base = self.min_x if is_x else self.min_y
+        else:
+            base = 0.0
 
-            self._update_bounds(p3.real, p3.imag)
+        if not self.normalize:
+            return f"{value - base:.6f}"
 
-            nx1 = self._normalize_coord(p1.real, True)
-            ny1 = self._normalize_coord(p1.imag, False)
-            nx2 = self._normalize_coord(p2.real, True)
-            ny2 = self._normalize_coord(p2.imag, False)
-            nx3 = self._normalize_coord(p3.real, True)
-            ny3 = self._normalize_coord(p3.imag, False)
+        return f"{(value - base) / self._max_dim():.6f}"
 
-            lua_lines.append(f"  ImGui.DrawList_PathBezierCubicCurveTo(dl, x + s*{nx1}, y + s*{ny1}, x + s*{nx2}, y + s*{ny2}, x + s*{nx3}, y + s*{ny3})")
+    def _max_dim(self) -> float:
+        """Largest side of the content bounds, used as the normalization scale."""
+        return self.bounds.max_dim if self.bounds else 1.0
 
-    def _is_likely_convex(self, path) -> bool:
-        """Heuristic check if a path is likely convex (safe for PathFillConvex)."""
-        if len(path) <= 3:
-            return True  # Triangle or simpler is always convex
-        
-        # Simple rectangle (4 line segments)
-        if len(path) == 4 and all(isinstance(seg, Line) for seg in path):
-            return True
-        
-        # Circle-like shapes (smooth bezier curves, no lines)
-        if all(isinstance(seg, (CubicBezier, QuadraticBezier)) for seg in path):
-            # If it's 4 bezier segments, likely a circle/ellipse
-            if len(path) == 4:
-                return True
-        
-        # Mixed line and bezier with many segments suggests complex shape
-        has_lines = any(isinstance(seg, Line) for seg in path)
-        has_beziers = any(isinstance(seg, (CubicBezier, QuadraticBezier)) for seg in path)
-        
-        if has_lines and has_beziers and len(path) > 5:
-            return False  # Complex mixed shape, probably non-convex
-        
-        return True  # Default to convex
-
-    def path_to_lua(self, path, fill: str = 'none', stroke: str = 'none',
-                    stroke_width: float = 1.0) -> List[str]:
-        """Convert a svgpathtools Path to Lua DrawList commands."""
-        lua_lines = []
-
-        if not path:
-            return lua_lines
-
-        lua_lines.append("  ImGui.DrawList_PathClear(dl)")
-
-        # Calculate bounds from actual path data (always needed for normalization)
-        if self.normalize:
-            for segment in path:
-                if isinstance(segment, Line):
-                    self._update_bounds(segment.start.real, segment.start.imag)
-                    self._update_bounds(segment.end.real, segment.end.imag)
-                elif isinstance(segment, QuadraticBezier):
-                    self._update_bounds(segment.start.real, segment.start.imag)
-                    self._update_bounds(segment.end.real, segment.end.imag)
-                    self._update_bounds(segment.control.real, segment.control.imag)
-                elif isinstance(segment, CubicBezier):
-                    self._update_bounds(segment.start.real, segment.start.imag)
-                    self._update_bounds(segment.end.real, segment.end.imag)
-                    self._update_bounds(segment.control1.real, segment.control1.imag)
-                    self._update_bounds(segment.control2.real, segment.control2.imag)
-                elif isinstance(segment, Arc):
-                    for t in [0, 0.25, 0.5, 0.75, 1.0]:
-                        pt = segment.point(t)
-                        self._update_bounds(pt.real, pt.imag)
-
-        # Second pass: generate Lua code
-        first_point = True
-        for segment in path:
-            if isinstance(segment, Line):
-                start_x, start_y = segment.start.real, segment.start.imag
-                end_x, end_y = segment.end.real, segment.end.imag
-
-                if first_point:
-                    nx = self._normalize_coord(start_x, True)
-                    ny = self._normalize_coord(start_y, False)
-                    lua_lines.append(f"  ImGui.DrawList_PathLineTo(dl, x + s*{nx}, y + s*{ny})")
-                    first_point = False
-
-                nx = self._normalize_coord(end_x, True)
-                ny = self._normalize_coord(end_y, False)
-                lua_lines.append(f"  ImGui.DrawList_PathLineTo(dl, x + s*{nx}, y + s*{ny})")
-
-            elif isinstance(segment, QuadraticBezier):
-                start_x, start_y = segment.start.real, segment.start.imag
-                ctrl_x, ctrl_y = segment.control.real, segment.control.imag
-                end_x, end_y = segment.end.real, segment.end.imag
-
-                if first_point:
-                    nx = self._normalize_coord(start_x, True)
-                    ny = self._normalize_coord(start_y, False)
-                    lua_lines.append(f"  ImGui.DrawList_PathLineTo(dl, x + s*{nx}, y + s*{ny})")
-                    first_point = False
-
-                nc_x = self._normalize_coord(ctrl_x, True)
-                nc_y = self._normalize_coord(ctrl_y, False)
-                ne_x = self._normalize_coord(end_x, True)
-                ne_y = self._normalize_coord(end_y, False)
-
-                lua_lines.append(f"  ImGui.DrawList_PathBezierQuadraticCurveTo(dl, x + s*{nc_x}, y + s*{nc_y}, x + s*{ne_x}, y + s*{ne_y})")
+    def _normalize_length(self, value: float) -> str:
+        """Normalize a length (radius, rounding) with the coordinate scale."""
+        if not self.normalize:
+            return f"{value:.6f}"
+        return f"{value / self._max_dim():.6f}"
+
+    def _point(self, px: float, py: float) -> str:
+        """Format an absolute point as 'x + s*nx, y + s*ny'."""
+        return f"x + s*{self._normalize_coord(px, True)}, y + s*{self._normalize_coord(py, False)}"
+
+    def shape_to_lua(self, shape: BasicShape) -> Iterator[str]:
+        """Yield native DrawList primitive calls for a basic shape."""
+        for op, width in shape_paint_ops(shape):
+            thickness = f"{width:.2f} * dpi"
+
+            if isinstance(shape, CircleShape):
+                center = self._point(shape.cx, shape.cy)
+                radius = f"s*{self._normalize_length(shape.r)}"
+                if op == 'fill':
+                    yield f"  ImGui.DrawList_AddCircleFilled(dl, {center}, {radius}, color)"
+                else:
+                    yield f"  ImGui.DrawList_AddCircle(dl, {center}, {radius}, color, 0, {thickness})"
 
-            elif isinstance(segment, CubicBezier):
-                start_x, start_y = segment.start.real, segment.start.imag
-                cp1_x, cp1_y = segment.control1.real, segment.control1.imag
-                cp2_x, cp2_y = segment.control2.real, segment.control2.imag
-                end_x, end_y = segment.end.real, segment.end.imag
-
-                if first_point:
-                    nx = self._normalize_coord(start_x, True)
-                    ny = self._normalize_coord(start_y, False)
-                    lua_lines.append(f"  ImGui.DrawList_PathLineTo(dl, x + s*{nx}, y + s*{ny})")
-                    first_point = False
-
-                nc1_x = self._normalize_coord(cp1_x, True)
-                nc1_y = self._normalize_coord(cp1_y, False)
-                nc2_x = self._normalize_coord(cp2_x, True)
-                nc2_y = self._normalize_coord(cp2_y, False)
-                ne_x = self._normalize_coord(end_x, True)
-                ne_y = self._normalize_coord(end_y, False)
-
-                lua_lines.append(f"  ImGui.DrawList_PathBezierCubicCurveTo(dl, x + s*{nc1_x}, y + s*{nc1_y}, x + s*{nc2_x}, y + s*{nc2_y}, x + s*{ne_x}, y + s*{ne_y})")
+            elif isinstance(shape, EllipseShape):
+                center = self._point(shape.cx, shape.cy)
+                radii = f"s*{self._normalize_length(shape.rx)}, s*{self._normalize_length(shape.ry)}"
+                if op == 'fill':
+                    yield f"  ImGui.DrawList_AddEllipseFilled(dl, {center}, {radii}, color)"
+                else:
+                    yield f"  ImGui.DrawList_AddEllipse(dl, {center}, {radii}, color, 0, 0, {thickness})"
+
+            elif isinstance(shape, RectShape):
+                p_min = self._point(shape.x, shape.y)
+                p_max = self._point(shape.x + shape.width, shape.y + shape.height)
+                rounding = f"s*{self._normalize_length(shape.rounding)}" if shape.rounding > 0 else "0"
+                if op == 'fill':
+                    yield f"  ImGui.DrawList_AddRectFilled(dl, {p_min}, {p_max}, color, {rounding})"
+                else:
+                    yield f"  ImGui.DrawList_AddRect(dl, {p_min}, {p_max}, color, {rounding}, 0, {thickness})"
 
-            elif isinstance(segment, Arc):
-                if first_point:
-                    start_x, start_y = segment.start.real, segment.start.imag
-                    nx = self._normalize_coord(start_x, True)
-                    ny = self._normalize_coord(start_y, False)
-                    lua_lines.append(f"  ImGui.DrawList_PathLineTo(dl, x + s*{nx}, y + s*{ny})")
-                    first_point = False
+            elif isinstance(shape, LineShape):
+                p1 = self._point(shape.x1, shape.y1)
+                p2 = self._point(shape.x2, shape.y2)
+                yield f"  ImGui.DrawList_AddLine(dl, {p1}, {p2}, color, {thickness})"
 
-                self._arc_to_lua(segment, lua_lines)
+    def path_to_lua(self, ops: 'np.ndarray', coords: 'np.ndarray', style: PathStyle,
+                    origin: Optional[complex] = None) -> Iterator[str]:
+        """Yield Lua DrawList commands for one IR path (see GeometryIR.path).
 
-        has_fill = fill not in ['none', 'transparent', '']
-        has_stroke = stroke not in ['none', 'transparent', '']
-        
-        # Check if path is likely convex
-        is_convex = self._is_likely_convex(path)
+        The generator's bounds must cover the whole document (see
+        compute_bounds) so all paths share one coordinate frame.
+        With an origin, coordinates are emitted relative to it.
+        """
+        if not len(ops):
+            return
 
-        if has_fill:
-            if is_convex:
-                lua_lines.append(f"  ImGui.DrawList_PathFillConvex(dl, color)")
-            else:
-                # Non-convex path - use stroke instead to avoid rendering issues
-                lua_lines.append(f"  ImGui.DrawList_PathStroke(dl, color, ImGui.DrawFlags_Closed, 2.5 * dpi)")
+        yield "  ImGui.DrawList_PathClear(dl)"
 
-        if has_stroke:
-            lua_lines.append(f"  ImGui.DrawList_PathStroke(dl, color, ImGui.DrawFlags_Closed, {stroke_width:.2f} * dpi)")
+        row = 0
+        for op in ops:
+            count = OP_POINTS[op]
+            points = ', '.join(
+                f"x + s*{self._normalize_coord(px, True, origin)}, y + s*{self._normalize_coord(py, False, origin)}"
+                for px, py in coords[row:row + count]
+            )
+            row += count
 
-        if not has_fill and not has_stroke:
-            if is_convex:
-                lua_lines.append(f"  ImGui.DrawList_PathFillConvex(dl, color)")
+            if op == OP_QUAD:
+                yield f"  ImGui.DrawList_PathBezierQuadraticCurveTo(dl, {points})"
+            elif op == OP_CUBIC:
+                yield f"  ImGui.DrawList_PathBezierCubicCurveTo(dl, {points})"
             else:
-                lua_lines.append(f"  ImGui.DrawList_PathStroke(dl, color, ImGui.DrawFlags_Closed, 2.0 * dpi)")
+                yield f"  ImGui.DrawList_PathLineTo(dl, {points})"
 
-        return lua_lines
+        for op, width in paint_ops(style.fill, style.stroke, style.stroke_width, style.convex):
+            if op == 'fill':
+                yield "  ImGui.DrawList_PathFillConvex(dl, color)"
+            else:
+                yield f"  ImGui.DrawList_PathStroke(dl, color, ImGui.DrawFlags_Closed, {width:.2f} * dpi)"
+
+
+class DocumentBounds(NamedTuple):
+    """Tight bounds of a document, computed once and shared by every stage.
+
+    path_boxes and shape_boxes hold one [min_x, min_y, max_x, max_y] row per
+    path / basic shape; the scalar fields cover the whole document.
+    """
+    path_boxes: 'np.ndarray'
+    shape_boxes: 'np.ndarray'
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+    @property
+    def max_dim(self) -> float:
+        """Largest side of the document bounds (1.0 when empty or degenerate)."""
+        size = max(self.max_x - self.min_x, self.max_y - self.min_y)
+        return size if size > 0 else 1.0
+
+
+def _unit_roots(a: 'np.ndarray', b: 'np.ndarray', c: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """Roots strictly inside (0, 1) of a*t^2 + b*t + c = 0, for arrays of coefficients.
+
+    Returns (t, row) where row indexes the coefficient arrays; degenerate
+    (near-zero a) rows are solved as linear equations.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quadratic = np.abs(a) > 1e-12
+        sq = np.sqrt(np.where(b * b - 4 * a * c >= 0, b * b - 4 * a * c, np.nan))
+        r1 = np.where(quadratic, (-b + sq) / (2 * a), -c / b)
+        r2 = np.where(quadratic, (-b - sq) / (2 * a), np.nan)
+    t = np.concatenate([r1, r2])
+    rows = np.concatenate([np.arange(len(a)), np.arange(len(a))])
+    inside = np.isfinite(t) & (t > 0) & (t < 1)
+    return t[inside], rows[inside]
+
+
+def _bezier_extrema(ctrl: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """Interior extreme points of quadratic/cubic Beziers.
+
+    ctrl is a (K, 3) or (K, 4) complex array of control points. Extremes are
+    where either coordinate's derivative vanishes. Returns (points, row).
+    """
+    degree = ctrl.shape[1] - 1
+    diffs = ctrl[:, 1:] - ctrl[:, :-1]
+    if degree == 2:
+        # B'(t)/2 = d0 + t*(d1 - d0)
+        coeffs = (np.zeros(len(ctrl), dtype=complex), diffs[:, 1] - diffs[:, 0], diffs[:, 0])
+    else:
+        # B'(t)/3 = (d0 - 2*d1 + d2)*t^2 + 2*(d1 - d0)*t + d0
+        coeffs = (diffs[:, 0] - 2 * diffs[:, 1] + diffs[:, 2], 2 * (diffs[:, 1] - diffs[:, 0]), diffs[:, 0])
+
+    points, rows = [], []
+    for part in (np.real, np.imag):
+        t, row = _unit_roots(*(part(c) for c in coeffs))
+        u = (1 - t)[:, None]
+        tt = t[:, None]
+        # de Casteljau on the selected rows
+        pts = ctrl[row]
+        for _ in range(degree):
+            pts = pts[:, :-1] * u + pts[:, 1:] * tt
+        points.append(pts[:, 0])
+        rows.append(row)
+    return np.concatenate(points), np.concatenate(rows)
+
+
+def _arc_extrema(center, rx, ry, phi, theta, delta) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Interior extreme points of elliptical arcs given in center form.
+
+    theta/delta are the start angle and sweep in degrees, phi the rotation in
+    radians (svgpathtools conventions). Returns (points, row).
+    """
+    start = np.radians(theta)
+    sweep = np.radians(delta)
+    cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+
+    # Angles where dx/da = 0 and dy/da = 0; each repeats every pi
+    ax = np.arctan2(-ry * sin_phi, rx * cos_phi)
+    ay = np.arctan2(ry * cos_phi, rx * sin_phi)
+    angles = np.stack([ax, ax + np.pi, ay, ay + np.pi], axis=1)
+
+    # Keep candidates that fall inside the swept range
+    offset = np.mod((angles - start[:, None]) * np.sign(sweep)[:, None], 2 * np.pi)
+    inside = offset <= np.abs(sweep)[:, None]
+    rows = np.nonzero(inside)[0]
+    a = angles[inside]
+
+    ex = rx[rows] * np.cos(a)
+    ey = ry[rows] * np.sin(a)
+    points = (center[rows] + (cos_phi[rows] + 1j * sin_phi[rows]) * (ex + 1j * ey))
+    return points, rows
+
+
+def compute_path_boxes(paths) -> 'np.ndarray':
+    """Tight [min_x, min_y, max_x, max_y] per path, vectorized over all segments.
+
+    Bounds come from segment endpoints plus the derivative roots of Beziers and
+    the angular extrema of arcs, so control points never inflate them.
+    """
+    ends, end_rows = [], []
+    quads, quad_rows = [], []
+    cubics, cubic_rows = [], []
+    arcs, arc_rows = [], []
+
+    for idx, path in enumerate(paths):
+        for segment in path:
+            ends.extend((segment.start, segment.end))
+            end_rows.extend((idx, idx))
+            if isinstance(segment, QuadraticBezier):
+                quads.append((segment.start, segment.control, segment.end))
+                quad_rows.append(idx)
+            elif isinstance(segment, CubicBezier):
+                cubics.append((segment.start, segment.control1, segment.control2, segment.end))
+                cubic_rows.append(idx)
+            elif isinstance(segment, Arc):
+                arcs.append((segment.center, segment.radius.real, segment.radius.imag,
+                             segment.phi, segment.theta, segment.delta))
+                arc_rows.append(idx)
+
+    points = [np.array(ends, dtype=complex)]
+    owners = [np.array(end_rows, dtype=int)]
+
+    for ctrl, rows in ((quads, quad_rows), (cubics, cubic_rows)):
+        if ctrl:
+            pts, sel = _bezier_extrema(np.array(ctrl, dtype=complex))
+            points.append(pts)
+            owners.append(np.array(rows, dtype=int)[sel])
+
+    if arcs:
+        params = np.array(arcs, dtype=complex)
+        pts, sel = _arc_extrema(params[:, 0], *(params[:, i].real for i in range(1, 6)))
+        points.append(pts)
+        owners.append(np.array(arc_rows, dtype=int)[sel])
+
+    points = np.concatenate(points)
+    owners = np.concatenate(owners)
+
+    boxes = np.empty((len(paths), 4))
+    boxes[:, :2] = np.inf
+    boxes[:, 2:] = -np.inf
+    np.minimum.at(boxes[:, 0], owners, points.real)
+    np.minimum.at(boxes[:, 1], owners, points.imag)
+    np.maximum.at(boxes[:, 2], owners, points.real)
+    np.maximum.at(boxes[:, 3], owners, points.imag)
+    return boxes
+
+
+def compute_shape_boxes(shapes: List[BasicShape]) -> 'np.ndarray':
+    """Exact [min_x, min_y, max_x, max_y] per basic shape."""
+    boxes = np.empty((len(shapes), 4))
+    for idx, shape in enumerate(shapes):
+        if isinstance(shape, CircleShape):
+            boxes[idx] = (shape.cx - shape.r, shape.cy - shape.r, shape.cx + shape.r, shape.cy + shape.r)
+        elif isinstance(shape, EllipseShape):
+            boxes[idx] = (shape.cx - shape.rx, shape.cy - shape.ry, shape.cx + shape.rx, shape.cy + shape.ry)
+        elif isinstance(shape, RectShape):
+            boxes[idx] = (shape.x, shape.y, shape.x + shape.width, shape.y + shape.height)
+        else:
+            boxes[idx] = (min(shape.x1, shape.x2), min(shape.y1, shape.y2),
+                          max(shape.x1, shape.x2), max(shape.y1, shape.y2))
+    return boxes
+
+
+def compute_bounds(paths, shapes: List[BasicShape]) -> DocumentBounds:
+    """Compute per-item and document bounds once for every later stage."""
+    return bounds_from_boxes(compute_path_boxes(paths), compute_shape_boxes(shapes))
+
+
+def bounds_from_boxes(path_boxes: 'np.ndarray', shape_boxes: 'np.ndarray') -> DocumentBounds:
+    """Build DocumentBounds from per-path and per-shape boxes."""
+    boxes = np.vstack([path_boxes, shape_boxes])
+    boxes = boxes[np.isfinite(boxes).all(axis=1)]
+    if not len(boxes):
+        return DocumentBounds(path_boxes, shape_boxes,
+                              float('inf'), float('inf'), float('-inf'), float('-inf'))
+    return DocumentBounds(
+        path_boxes,
+        shape_boxes,
+        float(boxes[:, 0].min()),
+        float(boxes[:, 1].min()),
+        float(boxes[:, 2].max()),
+        float(boxes[:, 3].max()),
+    )
 
 
 def parse_viewbox(svg_root) -> Optional[Tuple[float, float, float, float]]:
@@ -322,9 +531,39 @@ def parse_viewbox(svg_root) -> Optional[Tuple[float, float, float, float]]:
     return None
 
 
-def parse_basic_shapes(svg_root) -> List[Tuple[str, str, str, float]]:
-    """Convert basic SVG shapes (circle, rect, ellipse, polygon, line, polyline) to path strings."""
+def _parse_points(points_str: str) -> List[complex]:
+    """Parse a polyline/polygon points attribute into complex points."""
+    values = points_str.replace(',', ' ').split()
+    return [complex(float(values[i]), float(values[i + 1]))
+            for i in range(0, len(values) - 1, 2)]
+
+
+def _rounded_rect_path(x: float, y: float, w: float, h: float, rx: float, ry: float) -> SvgPath:
+    """Build a rect with elliptical corners (no native ImGui equivalent) as a path."""
+    radius = complex(rx, ry)
+    return SvgPath(
+        Line(complex(x + rx, y), complex(x + w - rx, y)),
+        Arc(complex(x + w - rx, y), radius, 0, False, True, complex(x + w, y + ry)),
+        Line(complex(x + w, y + ry), complex(x + w, y + h - ry)),
+        Arc(complex(x + w, y + h - ry), radius, 0, False, True, complex(x + w - rx, y + h)),
+        Line(complex(x + w - rx, y + h), complex(x + rx, y + h)),
+        Arc(complex(x + rx, y + h), radius, 0, False, True, complex(x, y + h - ry)),
+        Line(complex(x, y + h - ry), complex(x, y + ry)),
+        Arc(complex(x, y + ry), radius, 0, False, True, complex(x + rx, y)),
+    )
+
+
+def parse_basic_shapes(svg_root) -> Tuple[List[BasicShape], List[Tuple[SvgPath, Dict[str, str]]]]:
+    """Read basic SVG shapes (circle, rect, ellipse, line, polyline, polygon).
+
+    Circles, ellipses, uniformly rounded rects and lines are returned as typed
+    primitives so they can be emitted as single native DrawList calls.
+    Polylines, polygons and rects with elliptical corners have no native
+    equivalent and are returned as (path, attributes) built directly from
+    segments.
+    """
     shapes = []
+    paths = []
     ns = {'svg': 'http://www.w3.org/2000/svg'}
 
     def find_elements(tag):
@@ -332,96 +571,82 @@ def parse_basic_shapes(svg_root) -> List[Tuple[str, str, str, float]]:
         return svg_root.findall(f'.//svg:{tag}', ns) + svg_root.findall(f'.//{tag}')
 
     for circle in find_elements('circle'):
-        cx = float(circle.get('cx', 0))
-        cy = float(circle.get('cy', 0))
         r = float(circle.get('r', 0))
-        fill = get_element_style(circle, 'fill', 'black')
-        stroke = get_element_style(circle, 'stroke', 'none')
-        stroke_width = float(get_element_style(circle, 'stroke-width', '1'))
-
-        path_d = f"M {cx-r},{cy} A {r},{r} 0 1,0 {cx+r},{cy} A {r},{r} 0 1,0 {cx-r},{cy} Z"
-        shapes.append((path_d, fill, stroke, stroke_width))
+        if r <= 0:
+            continue
+        shapes.append(CircleShape(
+            float(circle.get('cx', 0)),
+            float(circle.get('cy', 0)),
+            r,
+            get_element_style(circle, 'fill', 'black'),
+            get_element_style(circle, 'stroke', 'none'),
+            float(get_element_style(circle, 'stroke-width', '1')),
+        ))
 
     for ellipse in find_elements('ellipse'):
-        cx = float(ellipse.get('cx', 0))
-        cy = float(ellipse.get('cy', 0))
         rx = float(ellipse.get('rx', 0))
         ry = float(ellipse.get('ry', 0))
-        fill = get_element_style(ellipse, 'fill', 'black')
-        stroke = get_element_style(ellipse, 'stroke', 'none')
-        stroke_width = float(get_element_style(ellipse, 'stroke-width', '1'))
-
-        path_d = f"M {cx-rx},{cy} A {rx},{ry} 0 1,0 {cx+rx},{cy} A {rx},{ry} 0 1,0 {cx-rx},{cy} Z"
-        shapes.append((path_d, fill, stroke, stroke_width))
+        if rx <= 0 or ry <= 0:
+            continue
+        shapes.append(EllipseShape(
+            float(ellipse.get('cx', 0)),
+            float(ellipse.get('cy', 0)),
+            rx,
+            ry,
+            get_element_style(ellipse, 'fill', 'black'),
+            get_element_style(ellipse, 'stroke', 'none'),
+            float(get_element_style(ellipse, 'stroke-width', '1')),
+        ))
 
     for rect in find_elements('rect'):
         x = float(rect.get('x', 0))
         y = float(rect.get('y', 0))
         w = float(rect.get('width', 0))
         h = float(rect.get('height', 0))
-        rx = float(rect.get('rx', 0))
-        ry = float(rect.get('ry', rx))
+        if w <= 0 or h <= 0:
+            continue
+        # A missing rx/ry takes the other's value; both are clamped to half size
+        rx = rect.get('rx')
+        ry = rect.get('ry')
+        rx = float(rx if rx is not None else (ry or 0))
+        ry = float(ry if ry is not None else rx)
+        rx = min(rx, w / 2)
+        ry = min(ry, h / 2)
         fill = get_element_style(rect, 'fill', 'black')
         stroke = get_element_style(rect, 'stroke', 'none')
         stroke_width = float(get_element_style(rect, 'stroke-width', '1'))
 
-        if rx > 0 or ry > 0:
-            path_d = (f"M {x+rx},{y} "
-                     f"L {x+w-rx},{y} "
-                     f"A {rx},{ry} 0 0,1 {x+w},{y+ry} "
-                     f"L {x+w},{y+h-ry} "
-                     f"A {rx},{ry} 0 0,1 {x+w-rx},{y+h} "
-                     f"L {x+rx},{y+h} "
-                     f"A {rx},{ry} 0 0,1 {x},{y+h-ry} "
-                     f"L {x},{y+ry} "
-                     f"A {rx},{ry} 0 0,1 {x+rx},{y} Z")
+        if abs(rx - ry) > 1e-9:
+            paths.append((_rounded_rect_path(x, y, w, h, rx, ry),
+                          {'fill': fill, 'stroke': stroke, 'stroke-width': str(stroke_width)}))
         else:
-            path_d = f"M {x},{y} L {x+w},{y} L {x+w},{y+h} L {x},{y+h} Z"
-        shapes.append((path_d, fill, stroke, stroke_width))
+            shapes.append(RectShape(x, y, w, h, rx, fill, stroke, stroke_width))
 
     for line in find_elements('line'):
-        x1 = float(line.get('x1', 0))
-        y1 = float(line.get('y1', 0))
-        x2 = float(line.get('x2', 0))
-        y2 = float(line.get('y2', 0))
-        stroke = get_element_style(line, 'stroke', 'black')
-        stroke_width = float(get_element_style(line, 'stroke-width', '1'))
-
-        path_d = f"M {x1},{y1} L {x2},{y2}"
-        shapes.append((path_d, 'none', stroke, stroke_width))
-
-    for polyline in find_elements('polyline'):
-        points_str = polyline.get('points', '')
-        fill = get_element_style(polyline, 'fill', 'none')
-        stroke = get_element_style(polyline, 'stroke', 'black')
-        stroke_width = float(get_element_style(polyline, 'stroke-width', '1'))
-
-        if points_str:
-            points = points_str.replace(',', ' ').split()
-            if len(points) >= 2:
-                path_d = f"M {points[0]} {points[1]}"
-                for i in range(2, len(points), 2):
-                    if i+1 < len(points):
-                        path_d += f" L {points[i]} {points[i+1]}"
-                shapes.append((path_d, fill, stroke, stroke_width))
-
-    for polygon in find_elements('polygon'):
-        points_str = polygon.get('points', '')
-        fill = get_element_style(polygon, 'fill', 'black')
-        stroke = get_element_style(polygon, 'stroke', 'none')
-        stroke_width = float(get_element_style(polygon, 'stroke-width', '1'))
-
-        if points_str:
-            points = points_str.replace(',', ' ').split()
-            if len(points) >= 2:
-                path_d = f"M {points[0]} {points[1]}"
-                for i in range(2, len(points), 2):
-                    if i+1 < len(points):
-                        path_d += f" L {points[i]} {points[i+1]}"
-                path_d += " Z"
-                shapes.append((path_d, fill, stroke, stroke_width))
-
-    return shapes
+        shapes.append(LineShape(
+            float(line.get('x1', 0)),
+            float(line.get('y1', 0)),
+            float(line.get('x2', 0)),
+            float(line.get('y2', 0)),
+            get_element_style(line, 'stroke', 'black'),
+            float(get_element_style(line, 'stroke-width', '1')),
+        ))
+
+    for tag, default_fill, default_stroke, closed in (('polyline', 'none', 'black', False),
+                                                      ('polygon', 'black', 'none', True)):
+        for element in find_elements(tag):
+            points = _parse_points(element.get('points', ''))
+            if closed and len(points) > 1 and points[-1] != points[0]:
+                points.append(points[0])
+            if len(points) < 2:
+                continue
+            fill = get_element_style(element, 'fill', default_fill)
+            stroke = get_element_style(element, 'stroke', default_stroke)
+            stroke_width = float(get_element_style(element, 'stroke-width', '1'))
+            path = SvgPath(*[Line(a, b) for a, b in zip(points, points[1:])])
+            paths.append((path, {'fill': fill, 'stroke': stroke, 'stroke-width': str(stroke_width)}))
+
+    return shapes, paths
 
 
 def deduplicate_paths(paths, attributes):
@@ -469,12 +694,21 @@ def deduplicate_paths(paths, attributes):
     return unique_paths, unique_attrs
 
 
-def generate_lua_function(svg_path: Path, function_name: str = "draw_icon",
-                         normalize: bool = True) -> str:
-    """Generate complete Lua function from SVG file."""
+def load_svg_geometry(svg_path: Path) -> Tuple[list, List[Dict[str, str]], List[BasicShape],
+                                                Optional[Tuple[float, float, float, float]]]:
+    """Load deduplicated paths with their attributes, basic shapes and the viewBox."""
 
     try:
-        paths, attributes = svg2paths(str(svg_path))
+        # Basic shapes are read by parse_basic_shapes instead
+        paths, attributes = svg2paths(
+            str(svg_path),
+            convert_circles_to_paths=False,
+            convert_ellipses_to_paths=False,
+            convert_lines_to_paths=False,
+            convert_polylines_to_paths=False,
+            convert_polygons_to_paths=False,
+            convert_rectangles_to_paths=False,
+        )
     except Exception as e:
         raise ValueError(f"Failed to parse SVG: {e}")
 
@@ -482,75 +716,621 @@ def generate_lua_function(svg_path: Path, function_name: str = "draw_icon",
     root = tree.getroot()
     viewbox = parse_viewbox(root)
 
-    basic_shapes = parse_basic_shapes(root)
-    for path_d, fill, stroke, stroke_width in basic_shapes:
-        try:
-            path = parse_path(path_d)
-            paths.append(path)
-            attributes.append({'fill': fill, 'stroke': stroke, 'stroke-width': str(stroke_width)})
-        except:
-            pass
+    shapes, shape_paths = parse_basic_shapes(root)
+    for path, attrs in shape_paths:
+        paths.append(path)
+        attributes.append(attrs)
 
-    # Deduplicate paths
+    # Deduplicate paths and shapes
     paths, attributes = deduplicate_paths(paths, attributes)
+    shapes = list(dict.fromkeys(shapes))
 
-    if not paths:
+    if not paths and not shapes:
         raise ValueError(f"No paths found in SVG file: {svg_path}")
 
-    generator = LuaCodeGenerator(normalize=normalize, viewbox=viewbox)
+    return paths, attributes, shapes, viewbox
+
+
+def arc_to_cubics(arc: Arc) -> Iterator[Tuple[complex, complex, complex]]:
+    """Approximate an Arc with cubic Beziers, yielding (control1, control2, end).
+
+    The sweep is split into pieces of at most 90 degrees; each piece uses the
+    standard k = 4/3*tan(angle/4) handle length along the ellipse tangent.
+    """
+    num_segments = max(1, int(math.ceil(abs(arc.delta) / 90.0)))
+    step = math.radians(arc.delta) / num_segments
+    k = (4.0 / 3.0) * math.tan(step / 4.0)
+    rx, ry = arc.radius.real, arc.radius.imag
+    rot = complex(math.cos(arc.phi), math.sin(arc.phi))
+
+    def point(a: float) -> complex:
+        return arc.center + rot * complex(rx * math.cos(a), ry * math.sin(a))
+
+    def tangent(a: float) -> complex:
+        return rot * complex(-rx * math.sin(a), ry * math.cos(a))
+
+    start = math.radians(arc.theta)
+    for i in range(num_segments):
+        a0 = start + i * step
+        a1 = a0 + step
+        end = arc.end if i == num_segments - 1 else point(a1)
+        yield point(a0) + k * tangent(a0), end - k * tangent(a1), end
+
+
+class GeometryIR(NamedTuple):
+    """Array-backed geometry of one SVG document, shared by every backend.
+
+    All paths live in flat arrays: path i owns ops[op_offsets[i]:op_offsets[i + 1]]
+    and coords[coord_offsets[i]:coord_offsets[i + 1]], coords being (x, y)
+    rows in SVG units. Arcs are already converted to cubics.
+    """
+    source: str
+    viewbox: Optional[Tuple[float, float, float, float]]
+    ops: 'np.ndarray'
+    coords: 'np.ndarray'
+    op_offsets: 'np.ndarray'
+    coord_offsets: 'np.ndarray'
+    styles: List[PathStyle]
+    shapes: List[BasicShape]
+    bounds: DocumentBounds
+
+    @property
+    def path_count(self) -> int:
+        return len(self.styles)
+
+    def path(self, idx: int) -> Tuple['np.ndarray', 'np.ndarray']:
+        """Return the (ops, coords) views of one path."""
+        return (self.ops[self.op_offsets[idx]:self.op_offsets[idx + 1]],
+                self.coords[self.coord_offsets[idx]:self.coord_offsets[idx + 1]])
+
+
+def _path_ops(path) -> Tuple[List[int], List[complex]]:
+    """Encode a svgpathtools Path as IR opcodes and points."""
+    if not path:
+        return [], []
+
+    ops = [OP_MOVE]
+    points = [path[0].start]
+    for segment in path:
+        if isinstance(segment, Line):
+            ops.append(OP_LINE)
+            points.append(segment.end)
+        elif isinstance(segment, QuadraticBezier):
+            ops.append(OP_QUAD)
+            points.extend((segment.control, segment.end))
+        elif isinstance(segment, CubicBezier):
+            ops.append(OP_CUBIC)
+            points.extend((segment.control1, segment.control2, segment.end))
+        elif isinstance(segment, Arc):
+            for cubic in arc_to_cubics(segment):
+                ops.append(OP_CUBIC)
+                points.extend(cubic)
+    return ops, points
+
+
+def build_ir(svg_path: Path) -> GeometryIR:
+    """Parse an SVG file once into the geometry IR."""
+    paths, attributes, shapes, viewbox = load_svg_geometry(svg_path)
+    bounds = compute_bounds(paths, shapes)
+
+    ops, points = [], []
+    op_offsets, coord_offsets = [0], [0]
+    styles = []
+    for path, attrs in zip(paths, attributes):
+        path_ops, path_points = _path_ops(path)
+        ops.extend(path_ops)
+        points.extend(path_points)
+        op_offsets.append(len(ops))
+        coord_offsets.append(len(points))
+        styles.append(PathStyle(
+            attrs.get('fill', 'black'),
+            attrs.get('stroke', 'none'),
+            float(attrs.get('stroke-width', 1)),
+            is_likely_convex(path),
+        ))
+
+    points = np.array(points, dtype=complex)
+    return GeometryIR(
+        source=svg_path.name,
+        viewbox=viewbox,
+        ops=np.array(ops, dtype=np.uint8),
+        coords=np.column_stack([points.real, points.imag]),
+        op_offsets=np.array(op_offsets, dtype=np.int64),
+        coord_offsets=np.array(coord_offsets, dtype=np.int64),
+        styles=styles,
+        shapes=shapes,
+        bounds=bounds,
+    )
+
 
-    lua_lines = [
-        f"-- Auto-generated from {svg_path.name}",
-        f"-- Normalized: {normalize}",
-    ]
+SHAPE_TYPES = {cls.__name__: cls for cls in (CircleShape, EllipseShape, RectShape, LineShape)}
+
+
+def save_ir(ir: GeometryIR, output_file: Path) -> str:
+    """Serialize the IR to a compressed .npz archive (no pickled objects).
+
+    Written with write_atomic; returns the write status.
+    """
+    numeric = [[getattr(shape, name) for name in type(shape)._fields if name not in ('fill', 'stroke')]
+               for shape in ir.shapes]
+    shape_params = np.full((len(ir.shapes), 8), np.nan)
+    for row, values in enumerate(numeric):
+        shape_params[row, :len(values)] = values
+
+    def write(f):
+        np.savez_compressed(
+            f,
+            version=np.array(IR_FORMAT_VERSION),
+            source=np.array(ir.source),
+            viewbox=np.array(ir.viewbox if ir.viewbox else [], dtype=float),
+            ops=ir.ops,
+            coords=ir.coords,
+            op_offsets=ir.op_offsets,
+            coord_offsets=ir.coord_offsets,
+            fill=np.array([s.fill for s in ir.styles], dtype=str),
+            stroke=np.array([s.stroke for s in ir.styles], dtype=str),
+            stroke_width=np.array([s.stroke_width for s in ir.styles], dtype=float),
+            convex=np.array([s.convex for s in ir.styles], dtype=bool),
+            shape_type=np.array([type(s).__name__ for s in ir.shapes], dtype=str),
+            shape_fill=np.array([getattr(s, 'fill', '') for s in ir.shapes], dtype=str),
+            shape_stroke=np.array([s.stroke for s in ir.shapes], dtype=str),
+            shape_params=shape_params,
+            path_boxes=ir.bounds.path_boxes,
+            shape_boxes=ir.bounds.shape_boxes,
+        )
 
-    if viewbox:
-        lua_lines.append(f"-- ViewBox: {viewbox[0]:.1f} {viewbox[1]:.1f} {viewbox[2]:.1f} {viewbox[3]:.1f}")
+    return write_atomic(output_file, write, binary=True)
 
-    lua_lines.extend([
-        f"function M.{function_name}(ctx, x, y, size, color)",
-        "  local dl = ImGui.GetWindowDrawList(ctx)",
-        "  local dpi = ImGui.GetWindowDpiScale(ctx)",
-        "  local s = size * dpi",
-        ""
-    ])
 
-    for idx, (path, attrs) in enumerate(zip(paths, attributes)):
-        if idx > 0:
-            lua_lines.append("")
+def load_ir(ir_file: Path) -> GeometryIR:
+    """Load an IR archive written by save_ir."""
+    try:
+        archive = np.load(ir_file, allow_pickle=False)
+    except Exception as e:
+        raise ValueError(f"Failed to read geometry IR: {e}")
+
+    with archive as data:
+        if 'version' not in data or int(data['version']) != IR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported geometry IR format: {ir_file}")
+
+        styles = [PathStyle(str(fill), str(stroke), float(width), bool(convex))
+                  for fill, stroke, width, convex in zip(data['fill'], data['stroke'],
+                                                          data['stroke_width'], data['convex'])]
+
+        shapes = []
+        for kind, fill, stroke, params in zip(data['shape_type'], data['shape_fill'],
+                                              data['shape_stroke'], data['shape_params']):
+            cls = SHAPE_TYPES[str(kind)]
+            values = iter(params)
+            fields = {name: (str(fill) if name == 'fill' else str(stroke) if name == 'stroke'
+                             else float(next(values)))
+                      for name in cls._fields}
+            shapes.append(cls(**fields))
+
+        viewbox = tuple(float(v) for v in data['viewbox']) or None
+        return GeometryIR(
+            source=str(data['source']),
+            viewbox=viewbox,
+            ops=data['ops'],
+            coords=data['coords'].reshape(-1, 2),
+            op_offsets=data['op_offsets'],
+            coord_offsets=data['coord_offsets'],
+            styles=styles,
+            shapes=shapes,
+            bounds=bounds_from_boxes(data['path_boxes'].reshape(-1, 4), data['shape_boxes'].reshape(-1, 4)),
+        )
+
 
-        lua_lines.append(f"  -- Path {idx + 1}")
+def canonical_shape_key(ir: GeometryIR, idx: int) -> Optional[Tuple[tuple, complex, float]]:
+    """Hash a path's geometry up to translation and uniform scale.
 
-        fill = attrs.get('fill', 'black')
-        stroke = attrs.get('stroke', 'none')
-        stroke_width = float(attrs.get('stroke-width', 1))
+    The path is moved so its start point sits at the origin and scaled so its
+    bounding box (from DocumentBounds.path_boxes) has a unit long side;
+    rounded canonical coordinates plus the style form the key. Returns
+    (key, origin, scale), or None for paths that cannot be canonicalized
+    (empty or zero-size).
+    """
+    ops, coords = ir.path(idx)
+    if not len(ops):
+        return None
 
-        path_lua = generator.path_to_lua(path, fill, stroke, stroke_width)
-        lua_lines.extend(path_lua)
+    xmin, ymin, xmax, ymax = ir.bounds.path_boxes[idx]
+    scale = max(xmax - xmin, ymax - ymin)
+    if scale <= 0:
+        return None
 
-    lua_lines.append("end")
+    # Adding 0.0 folds -0.0 into 0.0 so the bytes compare equal
+    canon = np.round((coords - coords[0]) / scale, INSTANCE_KEY_PRECISION) + 0.0
+    style = ir.styles[idx]
+    key = (style.fill, style.stroke, style.stroke_width, ops.tobytes(), canon.tobytes())
+    return key, complex(coords[0, 0], coords[0, 1]), scale
+
+
+def group_instances(ir: GeometryIR) -> List[List[Tuple[int, Optional[complex], float]]]:
+    """Group paths that are the same shape under translation and uniform scale.
+
+    Returns groups of (path index, origin, scale) in order of first appearance.
+    Paths that cannot be canonicalized always end up in their own group.
+    """
+    groups: Dict[tuple, List[Tuple[int, Optional[complex], float]]] = {}
+
+    for idx in range(ir.path_count):
+        canonical = canonical_shape_key(ir, idx)
+        if canonical is None:
+            groups[('unique', idx)] = [(idx, None, 1.0)]
+            continue
+
+        key, origin, scale = canonical
+        groups.setdefault(key, []).append((idx, origin, scale))
+
+    return list(groups.values())
+
+
+def _path_groups(ir: GeometryIR, instancing: bool) -> List[List[Tuple[int, Optional[complex], float]]]:
+    if instancing:
+        return group_instances(ir)
+    return [[(idx, None, 1.0)] for idx in range(ir.path_count)]
+
+
+def iter_lua_function(ir: GeometryIR, function_name: str = "draw_icon",
+                      normalize: bool = True, instancing: bool = True) -> Iterator[str]:
+    """Yield the lines of a Lua draw function generated from the geometry IR.
+
+    Bounds come precomputed with the IR, so the header is correct and the
+    body can be streamed straight through.
+    With instancing, shapes repeated under translation/scale are emitted once
+    as a helper plus a table of (x offset, y offset, scale) instances. Basic
+    shapes are emitted last as native DrawList primitives.
+    """
+    generator = LuaCodeGenerator(normalize=normalize, viewbox=ir.viewbox, bounds=ir.bounds)
+    viewbox = ir.viewbox
+
+    groups = _path_groups(ir, instancing)
+    instanced = [group for group in groups if len(group) > 1]
+
+    yield f"-- Auto-generated from {ir.source}"
+    yield f"-- Normalized: {normalize}"
 
     if generator.min_x != float('inf'):
-        lua_lines.insert(2, f"-- Bounds: ({generator.min_x:.2f}, {generator.min_y:.2f}) to ({generator.max_x:.2f}, {generator.max_y:.2f})")
+        yield f"-- Bounds: ({generator.min_x:.2f}, {generator.min_y:.2f}) to ({generator.max_x:.2f}, {generator.max_y:.2f})"
 
-    return '\n'.join(lua_lines)
+    if viewbox:
+        yield f"-- ViewBox: {viewbox[0]:.1f} {viewbox[1]:.1f} {viewbox[2]:.1f} {viewbox[3]:.1f}"
+
+    if instanced:
+        yield f"-- Instanced: {len(instanced)} shape(s), {sum(len(g) for g in instanced)} instance(s)"
+        yield f"local {function_name}_shapes = {{}}"
+        yield f"local {function_name}_instances = {{}}"
+
+    shape_ids = {}
+    for group in instanced:
+        shape_id = len(shape_ids) + 1
+        shape_ids[id(group)] = shape_id
+        proto_idx, proto_origin, proto_scale = group[0]
+
+        yield ""
+        yield f"{function_name}_shapes[{shape_id}] = function(dl, x, y, s, color, dpi)"
+        yield from generator.path_to_lua(*ir.path(proto_idx), ir.styles[proto_idx], origin=proto_origin)
+        yield "end"
+        yield f"{function_name}_instances[{shape_id}] = {{"
+        for _, origin, scale in group:
+            ox = generator._normalize_coord(origin.real, True)
+            oy = generator._normalize_coord(origin.imag, False)
+            yield f"  {{{ox}, {oy}, {scale / proto_scale:.6f}}},"
+        yield "}"
+
+    if instanced:
+        yield ""
+
+    yield f"function M.{function_name}(ctx, x, y, size, color)"
+    yield "  local dl = ImGui.GetWindowDrawList(ctx)"
+    yield "  local dpi = ImGui.GetWindowDpiScale(ctx)"
+    yield "  local s = size * dpi"
+    yield ""
+
+    for idx, group in enumerate(groups):
+        if idx > 0:
+            yield ""
+
+        if len(group) > 1:
+            shape_id = shape_ids[id(group)]
+            yield f"  -- Shape {shape_id} ({len(group)} instances)"
+            yield f"  for _, inst in ipairs({function_name}_instances[{shape_id}]) do"
+            yield f"    {function_name}_shapes[{shape_id}](dl, x + s*inst[1], y + s*inst[2], s*inst[3], color, dpi)"
+            yield "  end"
+            continue
+
+        path_idx = group[0][0]
+        yield f"  -- Path {idx + 1}"
+        yield from generator.path_to_lua(*ir.path(path_idx), ir.styles[path_idx])
+
+    for idx, shape in enumerate(ir.shapes, len(groups)):
+        if idx > 0:
+            yield ""
+
+        yield f"  -- {type(shape).__name__[:-len('Shape')]} {idx + 1}"
+        yield from generator.shape_to_lua(shape)
+
+    yield "end"
+
+
+def generate_lua_function(svg_path: Path, function_name: str = "draw_icon",
+                          normalize: bool = True, instancing: bool = True) -> str:
+    """Generate complete Lua function from SVG file."""
+    return '\n'.join(iter_lua_function(build_ir(svg_path), function_name, normalize, instancing))
+
+
+def iter_lua_module(ir: GeometryIR, function_name: str = "draw_icon",
+                    normalize: bool = True, instancing: bool = True) -> Iterator[str]:
+    """Yield the lines of a standalone Lua module wrapping the draw function."""
+    yield "-- @noindex"
+    yield f"-- Generated from {ir.source}"
+    yield "package.path = reaper.ImGui_GetBuiltinPath() .. '/?.lua;' .. package.path"
+    yield "local ImGui = require 'imgui' '0.10'"
+    yield ""
+    yield "local M = {}"
+    yield ""
+    yield from iter_lua_function(ir, function_name, normalize, instancing)
+    yield ""
+    yield "return M"
+
+
+def iter_ir_stats(ir: GeometryIR, function_name: str = "draw_icon",
+                  normalize: bool = True, instancing: bool = True) -> Iterator[str]:
+    """Yield a plain-text summary of the IR (sizes, segment mix, instancing)."""
+    op_counts = np.bincount(ir.ops, minlength=len(OP_POINTS))
+    shape_counts: Dict[str, int] = {}
+    for shape in ir.shapes:
+        name = type(shape).__name__[:-len('Shape')].lower()
+        shape_counts[name] = shape_counts.get(name, 0) + 1
+    instanced = [group for group in _path_groups(ir, instancing) if len(group) > 1]
+    bounds = ir.bounds
+
+    yield f"Source: {ir.source}"
+    yield f"Function: {function_name}"
+    yield f"Paths: {ir.path_count}"
+    yield (f"Segments: {int(op_counts[OP_LINE:].sum())} "
+           f"(line {op_counts[OP_LINE]}, quadratic {op_counts[OP_QUAD]}, cubic {op_counts[OP_CUBIC]})")
+    yield f"Points: {len(ir.coords)}"
+    yield f"Shapes: {len(ir.shapes)}" + (
+        f" ({', '.join(f'{name} {count}' for name, count in shape_counts.items())})" if shape_counts else "")
+    if bounds.min_x != float('inf'):
+        yield f"Bounds: ({bounds.min_x:.2f}, {bounds.min_y:.2f}) to ({bounds.max_x:.2f}, {bounds.max_y:.2f})"
+    if ir.viewbox:
+        yield f"ViewBox: {' '.join(f'{v:.1f}' for v in ir.viewbox)}"
+    if instancing:
+        yield (f"Instanced: {len(instanced)} shape(s), "
+               f"{sum(len(g) for g in instanced)} instance(s)")
+
+
+# Module-level helpers shared by every packed draw function. A packed path is
+# a byte string of commands: one opcode byte (see OP_*), then OP_POINTS[op]
+# little-endian int16 (x, y) pairs. It is decoded once into a cached array and
+# replayed from there; draw records are {path, x offset, y offset, scale, width}
+# with width -1 meaning fill.
+PACKED_RUNTIME = """\
+local PACKED_ARGS = {[0] = 2, 2, 4, 6}
+
+local function unpack_path(data, step)
+  local cmds, n, pos = {}, 0, 1
+  while pos <= #data do
+    local op, v
+    op, pos = string.unpack('B', data, pos)
+    n = n + 1
+    cmds[n] = op
+    for _ = 1, PACKED_ARGS[op] do
+      v, pos = string.unpack('<i2', data, pos)
+      n = n + 1
+      cmds[n] = v * step
+    end
+  end
+  return cmds
+end
+
+local function replay(dl, cmds, x, y, s)
+  ImGui.DrawList_PathClear(dl)
+  local i, n = 1, #cmds
+  while i <= n do
+    local op = cmds[i]
+    if op == 3 then
+      ImGui.DrawList_PathBezierCubicCurveTo(dl, x + s*cmds[i + 1], y + s*cmds[i + 2], x + s*cmds[i + 3], y + s*cmds[i + 4], x + s*cmds[i + 5], y + s*cmds[i + 6])
+      i = i + 7
+    elseif op == 2 then
+      ImGui.DrawList_PathBezierQuadraticCurveTo(dl, x + s*cmds[i + 1], y + s*cmds[i + 2], x + s*cmds[i + 3], y + s*cmds[i + 4])
+      i = i + 5
+    else
+      ImGui.DrawList_PathLineTo(dl, x + s*cmds[i + 1], y + s*cmds[i + 2])
+      i = i + 3
+    end
+  end
+end
+
+local function draw_packed(dl, data, cache, draws, step, x, y, s, color, dpi)
+  for _, d in ipairs(draws) do
+    local cmds = cache[d[1]]
+    if not cmds then
+      cmds = unpack_path(data[d[1]], step)
+      cache[d[1]] = cmds
+    end
+    replay(dl, cmds, x + s*d[2], y + s*d[3], s*d[4])
+    if d[5] < 0 then
+      ImGui.DrawList_PathFillConvex(dl, color)
+    else
+      ImGui.DrawList_PathStroke(dl, color, ImGui.DrawFlags_Closed, d[5] * dpi)
+    end
+  end
+end"""
+
+# Largest quantized magnitude; coordinates are stored as value / step in int16.
+PACKED_MAX = 32767
+
+
+def lua_byte_string(data: bytes) -> str:
+    """Quote raw bytes as an ASCII-only Lua string literal."""
+    out = []
+    for idx, byte in enumerate(data):
+        if 32 <= byte < 127 and byte not in (34, 92):  # printable except " and \
+            out.append(chr(byte))
+        elif idx + 1 < len(data) and 48 <= data[idx + 1] <= 57:
+            out.append(f"\\{byte:03d}")  # a digit follows, so pad the escape
+        else:
+            out.append(f"\\{byte}")
+    return '"' + ''.join(out) + '"'
+
+
+def _pack_path(ops: 'np.ndarray', values: 'np.ndarray', step: float) -> bytes:
+    """Encode one path as opcode bytes plus int16 (x, y) pairs."""
+    quantized = np.clip(np.round(values / step), -PACKED_MAX, PACKED_MAX).astype('<i2')
+    out = bytearray()
+    row = 0
+    for op in ops:
+        count = OP_POINTS[op]
+        out.append(int(op))
+        out += quantized[row:row + count].tobytes()
+        row += count
+    return bytes(out)
+
+
+def iter_packed_function(ir: GeometryIR, function_name: str = "draw_icon",
+                         normalize: bool = True, instancing: bool = True) -> Iterator[str]:
+    """Yield a draw function whose paths are stored as packed 16-bit strings.
+
+    Relies on the PACKED_RUNTIME helpers emitted by iter_packed_module.
+    Coordinates are normalized as in the Lua backend, then quantized with one
+    step per function so the largest magnitude maps to PACKED_MAX.
+    """
+    generator = LuaCodeGenerator(normalize=normalize, viewbox=ir.viewbox, bounds=ir.bounds)
+    divisor = generator._max_dim() if normalize else 1.0
+    corner = np.array([ir.bounds.min_x, ir.bounds.min_y]) if normalize else np.zeros(2)
+
+    # Normalized coordinates of each drawn path (prototype frame for instances)
+    packed = []
+    for group in _path_groups(ir, instancing):
+        proto_idx, proto_origin, _ = group[0]
+        ops, coords = ir.path(proto_idx)
+        if not len(ops):
+            continue
+        base = np.array([proto_origin.real, proto_origin.imag]) if len(group) > 1 else corner
+        packed.append((group, ops, (coords - base) / divisor))
+
+    peak = max((float(np.abs(values).max()) for _, _, values in packed), default=0.0)
+    step = peak / PACKED_MAX if peak > 0 else 1.0
+
+    yield f"-- Auto-generated from {ir.source}"
+    yield f"-- Normalized: {normalize}"
+    if generator.min_x != float('inf'):
+        yield f"-- Bounds: ({generator.min_x:.2f}, {generator.min_y:.2f}) to ({generator.max_x:.2f}, {generator.max_y:.2f})"
+    if ir.viewbox:
+        viewbox = ir.viewbox
+        yield f"-- ViewBox: {viewbox[0]:.1f} {viewbox[1]:.1f} {viewbox[2]:.1f} {viewbox[3]:.1f}"
+    yield f"-- Packed: {len(packed)} path(s), 16-bit step {step:.9g}"
+
+    yield f"local {function_name}_data = {{"
+    for _, ops, values in packed:
+        yield f"  {lua_byte_string(_pack_path(ops, values, step))},"
+    yield "}"
+    yield f"local {function_name}_cache = {{}}"
+
+    yield f"local {function_name}_draws = {{"
+    for data_idx, (group, _, _) in enumerate(packed, 1):
+        proto_idx, _, proto_scale = group[0]
+        style = ir.styles[proto_idx]
+        widths = [-1 if op == 'fill' else round(width, 2)
+                  for op, width in paint_ops(style.fill, style.stroke, style.stroke_width, style.convex)]
+
+        if len(group) > 1:
+            placements = [(generator._normalize_coord(origin.real, True),
+                           generator._normalize_coord(origin.imag, False),
+                           f"{scale / proto_scale:.6f}") for _, origin, scale in group]
+        else:
+            placements = [('0', '0', '1')]
+
+        for ox, oy, scale in placements:
+            for width in widths:
+                yield f"  {{{data_idx}, {ox}, {oy}, {scale}, {width}}},"
+    yield "}"
+    yield ""
+
+    yield f"function M.{function_name}(ctx, x, y, size, color)"
+    yield "  local dl = ImGui.GetWindowDrawList(ctx)"
+    yield "  local dpi = ImGui.GetWindowDpiScale(ctx)"
+    yield "  local s = size * dpi"
+    yield ""
+    yield (f"  draw_packed(dl, {function_name}_data, {function_name}_cache, {function_name}_draws, "
+           f"{step:.9g}, x, y, s, color, dpi)")
+
+    for idx, shape in enumerate(ir.shapes, 1):
+        yield ""
+        yield f"  -- {type(shape).__name__[:-len('Shape')]} {idx}"
+        yield from generator.shape_to_lua(shape)
+
+    yield "end"
+
+
+def iter_packed_module(ir: GeometryIR, function_name: str = "draw_icon",
+                       normalize: bool = True, instancing: bool = True) -> Iterator[str]:
+    """Yield a standalone Lua module using the packed path encoding."""
+    yield "-- @noindex"
+    yield f"-- Generated from {ir.source}"
+    yield "package.path = reaper.ImGui_GetBuiltinPath() .. '/?.lua;' .. package.path"
+    yield "local ImGui = require 'imgui' '0.10'"
+    yield ""
+    yield "local M = {}"
+    yield ""
+    yield from PACKED_RUNTIME.split('\n')
+    yield ""
+    yield from iter_packed_function(ir, function_name, normalize, instancing)
+    yield ""
+    yield "return M"
+
+
+# Output backends for --emit: module emitter and batch output suffix.
+BACKENDS = {
+    'lua': (iter_lua_module, '.lua'),
+    'packed': (iter_packed_module, '.lua'),
+    'stats': (iter_ir_stats, '.txt'),
+}
+
+
+def write_lines(handle: TextIO, lines: Iterable[str]):
+    """Write newline-separated lines to a handle without joining them first."""
+    lines = iter(lines)
+    for line in lines:
+        handle.write(line)
+        break
+    for line in lines:
+        handle.write('\n')
+        handle.write(line)
+
+
+def write_lua_file(output_file: Path, lines: Iterable[str]) -> str:
+    """Stream generated lines to disk through a buffered file handle.
+
+    Goes through write_atomic: unchanged outputs are not rewritten and an
+    interrupted run never leaves a truncated file. Returns the write status.
+    """
+    return write_atomic(output_file, lambda f: write_lines(f, lines),
+                        buffering=WRITE_BUFFER_SIZE)
 
 
 def process_batch(svg_dir: Path, output_dir: Optional[Path] = None,
-                  normalize: bool = True, verbose: bool = True) -> Tuple[int, int]:
-    """Process all SVG files in a directory."""
+                  normalize: bool = True, verbose: bool = True,
+                  instancing: bool = True, emit: str = 'lua') -> OutputStats:
+    """Process all SVG files in a directory with the given output backend.
+
+    Returns written/unchanged/failed counts; unchanged outputs keep their mtime.
+    """
     svg_files = list(svg_dir.glob('*.svg'))
+    stats = OutputStats()
 
     if not svg_files:
         if verbose:
             print(f"No SVG files found in: {svg_dir}", file=sys.stderr)
-        return 0, 0
+        return stats
 
     if output_dir:
         output_dir.mkdir(parents=True, exist_ok=True)
 
-    success_count = 0
-    error_count = 0
     total = len(svg_files)
 
     if verbose:
@@ -559,51 +1339,40 @@ def process_batch(svg_dir: Path, output_dir: Optional[Path] = None,
             print(f"Output directory: {output_dir}")
         print()
 
+    emitter, suffix = BACKENDS[emit]
+
     for idx, svg_file in enumerate(svg_files, 1):
         function_name = f"draw_{sanitize_function_name(svg_file.name)}"
 
         try:
-            lua_code = generate_lua_function(
-                svg_file,
-                function_name,
-                normalize=normalize
-            )
-
             # Always write to file (in svg dir if no output_dir specified)
             if output_dir:
-                output_file = output_dir / f"{svg_file.stem}.lua"
+                output_file = output_dir / f"{svg_file.stem}{suffix}"
             else:
-                output_file = svg_file.parent / f"{svg_file.stem}.lua"
-            
-            full_code = [
-                "-- @noindex",
-                f"-- Generated from {svg_file.name}",
-                "package.path = reaper.ImGui_GetBuiltinPath() .. '/?.lua;' .. package.path",
-                "local ImGui = require 'imgui' '0.10'",
-                "",
-                "local M = {}",
-                "",
-                lua_code,
-                "",
-                "return M"
-            ]
-            output_file.write_text('\n'.join(full_code))
+                output_file = svg_file.parent / f"{svg_file.stem}{suffix}"
 
-            if verbose:
-                print(f"[{idx}/{total}] OK: {svg_file.name} -> {output_file.name}")
+            status = write_lua_file(output_file, emitter(
+                build_ir(svg_file),
+                function_name,
+                normalize=normalize,
+                instancing=instancing
+            ))
+            stats.record(status)
 
-            success_count += 1
+            if verbose:
+                label = 'UNCHANGED' if status == UNCHANGED else 'OK'
+                print(f"[{idx}/{total}] {label}: {svg_file.name} -> {output_file.name}")
 
         except Exception as e:
-            error_count += 1
+            stats.record(FAILED)
             if verbose:
                 print(f"[{idx}/{total}] ERROR: {svg_file.name}: {e}", file=sys.stderr)
 
     if verbose:
         print()
-        print(f"Completed: {success_count} succeeded, {error_count} failed")
+        print(f"Completed: {stats.summary()}")
 
-    return success_count, error_count
+    return stats
 
 
 def main():
@@ -630,6 +1399,17 @@ Examples:
   # Without normalization
   python svg_to_lua.py icon.svg --no-normalize
 
+  # Unroll repeated shapes instead of sharing one helper per shape
+  python svg_to_lua.py icon.svg --no-instancing
+
+  # Parse once into a cached geometry IR, then emit from it
+  python svg_to_lua.py icon.svg --emit-ir icon.npz
+  python svg_to_lua.py --from-ir icon.npz -o icon.lua
+  python svg_to_lua.py --from-ir icon.npz --emit stats
+
+  # Packed 16-bit path strings decoded once at runtime
+  python svg_to_lua.py icon.svg --emit packed -o icon.lua
+
 Requirements:
   pip install svgpathtools
         """
@@ -641,6 +1421,14 @@ Requirements:
                        help='Lua function name (default: draw_icon)')
     parser.add_argument('--no-normalize', action='store_true',
                        help='Do not normalize coordinates')
+    parser.add_argument('--no-instancing', action='store_true',
+                       help='Unroll repeated shapes instead of emitting shared helpers')
+    parser.add_argument('--emit', choices=sorted(BACKENDS), default='lua',
+                       help='Output backend (default: lua)')
+    parser.add_argument('--emit-ir', type=Path, default=None,
+                       help='Write the parsed geometry IR (.npz) to this file')
+    parser.add_argument('--from-ir', type=Path, default=None,
+                       help='Read geometry from an IR file written by --emit-ir instead of an SVG')
     parser.add_argument('--batch', action='store_true',
                        help='Batch process all SVG files in svg/ folder')
     parser.add_argument('--svg-dir', type=Path, default=None,
@@ -652,7 +1440,13 @@ Requirements:
 
     args = parser.parse_args()
 
-    if not args.input and not args.batch:
+    if args.from_ir and (args.input or args.batch):
+        parser.error("--from-ir replaces the SVG input and cannot be combined with it or --batch")
+
+    if args.emit_ir and (args.batch or not args.input):
+        parser.error("--emit-ir needs a single SVG input")
+
+    if not args.input and not args.batch and not args.from_ir:
         script_dir = Path(__file__).parent
         default_svg_dir = script_dir / 'svg'
         
@@ -674,47 +1468,55 @@ Requirements:
             print(f"Create it with: mkdir -p {svg_dir}", file=sys.stderr)
             sys.exit(1)
 
-        success, errors = process_batch(
+        stats = process_batch(
             svg_dir,
             args.output_dir,
             normalize=not args.no_normalize,
-            verbose=not args.quiet
+            verbose=not args.quiet,
+            instancing=not args.no_instancing,
+            emit=args.emit
         )
 
-        sys.exit(0 if errors == 0 else 1)
+        sys.exit(0 if stats.failed == 0 else 1)
 
-    if not args.input:
+    if not args.input and not args.from_ir:
         parser.error("Either provide an input SVG file, use --batch mode, or place SVG files in svg/ folder")
 
-    if not args.input.exists():
-        print(f"Error: File not found: {args.input}", file=sys.stderr)
+    source = args.from_ir or args.input
+    if not source.exists():
+        print(f"Error: File not found: {source}", file=sys.stderr)
         sys.exit(1)
 
     try:
-        lua_code = generate_lua_function(
-            args.input,
-            args.function_name,
-            normalize=not args.no_normalize
-        )
+        ir = load_ir(args.from_ir) if args.from_ir else build_ir(args.input)
+
+        if args.emit_ir:
+            status = save_ir(ir, args.emit_ir)
+            print(f"Geometry IR {status}: {args.emit_ir}")
+            if not args.output:
+                return
 
+        emitter = BACKENDS[args.emit][0]
         if args.output:
-            full_code = [
-                "-- @noindex",
-                f"-- Generated from {args.input.name}",
-                "package.path = reaper.ImGui_GetBuiltinPath() .. '/?.lua;' .. package.path",
-                "local ImGui = require 'imgui' '0.10'",
-                "",
-                "local M = {}",
-                "",
-                lua_code,
-                "",
-                "return M"
-            ]
-
-            args.output.write_text('\n'.join(full_code))
-            print(f"Generated Lua code written to: {args.output}")
+            status = write_lua_file(args.output, emitter(
+                ir,
+                args.function_name,
+                normalize=not args.no_normalize,
+                instancing=not args.no_instancing
+            ))
+            print(f"Generated {args.emit} output {status}: {args.output}")
         else:
-            print(lua_code)
+            # The bare draw function is printed for Lua; other backends print whole
+            lines = (iter_lua_function if args.emit == 'lua' else emitter)(
+                ir,
+                args.function_name,
+                normalize=not args.no_normalize,
+                instancing=not args.no_instancing
+            )
+            # Pull the first line before printing, so an emitter error prints nothing
+            first = next(lines)
+            write_lines(sys.stdout, itertools.chain([first], lines))
+            print()
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)